@@ -63,8 +63,8 @@ async function fetchUsdtRate() {
  */
 async function loadBCVRates() {
   try {
-    // Fetch rates and history in parallel to avoid waterfall
-    const historyPromise = fetch('data/bcv-rates-history.json');
+    // Fetch rates and daily history rollup in parallel to avoid waterfall
+    const historyPromise = fetch('data/bcv-rates-daily.json');
 
     // Primary: edge API (SSR). Fallback: static JSON + live USDT
     let ratesResponse = await fetch('/api/bcv');
@@ -184,6 +184,12 @@ function displayRates() {
   if (updateInfo && bcvRates.last_updated) {
     const date = new Date(bcvRates.last_updated);
     updateInfo.textContent = `Última actualización: ${formatDateTime(date)}`;
+
+    // Rates served from cache while their source was down
+    const stale = ['usd', 'eur'].find(key => bcvRates[key] && bcvRates[key].stale);
+    if (stale && bcvRates[stale].fetched_at) {
+      updateInfo.textContent += ` (tasa BCV del ${formatDateTime(new Date(bcvRates[stale].fetched_at))})`;
+    }
   }
 }
 
@@ -199,14 +205,14 @@ function displayError() {
 }
 
 /**
- * Display rate history
+ * Display rate history (daily USD closes from the precomputed rollup)
  */
 function displayHistory() {
   const historyContainer = document.getElementById('bcvHistory');
-  if (!historyContainer || !bcvHistory || !bcvHistory.entries) return;
+  if (!historyContainer || !bcvHistory || !bcvHistory.currencies) return;
 
-  const entries = bcvHistory.entries.slice(0, 7); // Show last 7 entries
-  if (entries.length === 0) {
+  const days = (bcvHistory.currencies.usd || []).slice(0, 7); // Show last 7 days
+  if (days.length === 0) {
     historyContainer.innerHTML = '<div class="bcv-history-empty">Sin historial disponible</div>';
     return;
   }
@@ -214,10 +220,10 @@ function displayHistory() {
   let html = '<div class="bcv-history-header">Historial USD (BCV)</div>';
   html += '<div class="bcv-history-list">';
 
-  entries.forEach((entry, index) => {
-    const date = formatHistoryDate(entry.date);
-    const rate = formatRate(entry.usd.rate);
-    const variation = entry.usd.variation;
+  days.forEach((day, index) => {
+    const date = formatHistoryDate(day.period);
+    const rate = formatRate(day.close);
+    const variation = day.change_pct;
     const varClass = variation > 0 ? 'up' : variation < 0 ? 'down' : 'neutral';
     const varSymbol = variation > 0 ? '↑' : variation < 0 ? '↓' : '';
     const varText = variation !== 0 ? `${varSymbol} ${Math.abs(variation)}%` : '—';
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Published Artifacts
+Writes the JSON files the site serves only when their content changed.
+The comparison hashes the data without volatile keys such as
+'last_updated', so a run that fetched nothing new leaves the file (and
+the site's cache version) untouched.
+
+Site artifacts are published minified and with a schema version; the
+CDN compresses them on the fly. History lists can optionally be stored
+as columns (HISTORY_LAYOUT=columns).
+"""
+
+import hashlib
+import json
+import os
+
+from instrumentation import count
+
+VOLATILE_KEYS = ('last_updated',)
+
+SCHEMA_VERSION = 1
+
+# 'rows' (list of objects) or 'columns' (object of lists) for history lists
+HISTORY_LAYOUT = os.environ.get('HISTORY_LAYOUT', 'rows')
+
+
+def content_hash(data, volatile=VOLATILE_KEYS):
+    """SHA-256 of a JSON document without its volatile top-level keys"""
+    if isinstance(data, dict):
+        data = {k: v for k, v in data.items() if k not in volatile}
+    canonical = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def load_json(path):
+    """Load a JSON file, or None if it is missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, data, indent=2, separators=None, volatile=VOLATILE_KEYS):
+    """Write data to path unless the file already holds the same content
+
+    Returns True if the file was written, False if it was left alone.
+    """
+    existing = load_json(path)
+    if existing is not None and content_hash(existing, volatile) == content_hash(data, volatile):
+        count('artifacts.unchanged')
+        return False
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent, separators=separators)
+    os.replace(tmp_path, path)
+    count('artifacts.written')
+    return True
+
+
+def publish_json(path, data, schema_version=SCHEMA_VERSION):
+    """Write a site artifact: minified JSON with a schema version
+
+    Returns True if the artifact changed.
+    """
+    data = {'schema_version': schema_version, **data}
+    return write_json(path, data, indent=None, separators=(',', ':'))
+
+
+def to_columns(rows):
+    """Turn a list of objects into an object of lists
+
+    One level of nesting is flattened with dotted names ('eur.rate');
+    values missing from a row are None.
+    """
+    flat_rows = []
+    names = {}
+    for row in rows:
+        flat = {}
+        for key, value in row.items():
+            if isinstance(value, dict):
+                for sub_key, sub_value in value.items():
+                    flat[f"{key}.{sub_key}"] = sub_value
+            else:
+                flat[key] = value
+        names.update(dict.fromkeys(flat))
+        flat_rows.append(flat)
+    return {name: [flat.get(name) for flat in flat_rows] for name in names}
+
+
+def from_columns(columns):
+    """Inverse of to_columns(); None values are left out of the rows
+
+    Fine for rows whose optional fields are absent rather than null, like
+    the rates history entries.
+    """
+    names = list(columns)
+    length = max((len(values) for values in columns.values()), default=0)
+    rows = []
+    for i in range(length):
+        row = {}
+        for name in names:
+            value = columns[name][i]
+            if value is None:
+                continue
+            key, _, sub_key = name.partition('.')
+            if sub_key:
+                row.setdefault(key, {})[sub_key] = value
+            else:
+                row[key] = value
+        rows.append(row)
+    return rows
+
+
+def history_layout(rows):
+    """Lay out a history list as configured by HISTORY_LAYOUT"""
+    return to_columns(rows) if HISTORY_LAYOUT == 'columns' else rows
+
+
+def history_rows(value):
+    """Read a history list written in either layout"""
+    return from_columns(value) if isinstance(value, dict) else value
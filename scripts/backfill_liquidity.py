@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+BCV Workbook Backfill
+Loads multi-year M2 and base monetaria history from older BCV workbooks.
+Sources (URLs or local files) are downloaded concurrently, parsed in a
+process pool with the fetcher's parsers, and merged into the weekly
+series (data/bcv-liquidity-series.json): deduplicated by date, newest
+first. Each workbook's kind (liquidity or base monetaria) is detected
+from its first sheet.
+
+Usage:
+  python scripts/backfill_liquidity.py liquidez_2019.xls liquidez_2020.xls ...
+  python scripts/backfill_liquidity.py --list urls.txt [--workers 8] [--replace]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import fetch_bcv_liquidity as liquidity
+from http_client import get_client
+import instrumentation
+
+# kind -> parser and the value each week carries
+KINDS = {
+    'liquidity': {'parse': liquidity.parse_liquidity_excel, 'value': 'm2'},
+    'base_monetaria': {'parse': liquidity.parse_base_monetaria_excel, 'value': 'base'},
+}
+
+
+def read_source(source):
+    """Raw bytes of a workbook URL or local file; raises on failure"""
+    if source.startswith(('http://', 'https://')):
+        response = get_client().get(source, headers=liquidity.HEADERS, timeout=60, verify=False)
+        response.raise_for_status()
+        return response.content
+    with open(source, 'rb') as f:
+        return f.read()
+
+
+def _read_or_none(source):
+    try:
+        return read_source(source)
+    except Exception as e:
+        print(f"  ✗ {source}: {e}")
+        return None
+
+
+def workbook_kind(content):
+    """'base_monetaria' if the first column has the USOS row, else 'liquidity'"""
+    workbook, sheet = liquidity.open_first_sheet(content)
+    try:
+        return 'base_monetaria' if any(liquidity.is_usos_cell(c) for c in sheet.col_values(0)) else 'liquidity'
+    finally:
+        workbook.release_resources()
+
+
+def parse_workbook(job):
+    """Worker: parse every week of one workbook
+
+    Returns (source, kind, weeks or None, seconds, captured output).
+    """
+    source, content = job
+    log = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        try:
+            kind = workbook_kind(content)
+            weeks = KINDS[kind]['parse'](content, since='')
+        except Exception as e:
+            print(f"✗ {e}")
+            kind, weeks = None, None
+    return source, kind, weeks, time.perf_counter() - start, log.getvalue()
+
+
+def merge_backfill(section, weeks, value_key, replace=False):
+    """Merge backfilled weeks into a series section; returns weeks added
+
+    Stored weeks come from the current workbooks and carry BCV's latest
+    revisions, so they win over backfilled ones unless replace=True.
+    """
+    stored = {w['date'] for w in section['weeks']}
+    new = [w for w in weeks if replace or liquidity.iso_date(w['date']) not in stored]
+    liquidity.merge_weeks(section, new, value_key)
+    return len(new)
+
+
+def main(argv=None):
+    """Backfill the liquidity series from older workbooks"""
+    parser = argparse.ArgumentParser(description='Backfill BCV monetary history from workbooks')
+    parser.add_argument('sources', nargs='*', help='workbook URLs or local .xls files')
+    parser.add_argument('--list', metavar='FILE', help='file with one URL or path per line')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='parser processes (default: number of CPUs)')
+    parser.add_argument('--replace', action='store_true',
+                        help='let backfilled weeks overwrite weeks already in the series')
+    args = parser.parse_args(argv)
+
+    sources = list(args.sources)
+    if args.list:
+        with open(args.list, 'r', encoding='utf-8') as f:
+            sources += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if not sources:
+        parser.error('no workbooks given')
+
+    print("=" * 50)
+    print(f"BCV Workbook Backfill ({len(sources)} files, {args.workers} workers)")
+    print("=" * 50)
+
+    start = time.perf_counter()
+    print("\n→ Reading workbooks...")
+    jobs = []
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for source, content in zip(sources, executor.map(_read_or_none, sources)):
+            if content is not None:
+                jobs.append((source, content))
+    total_bytes = sum(len(content) for _, content in jobs)
+    print(f"✓ Read {len(jobs)} files ({total_bytes / 1024:.0f} KB) in {time.perf_counter() - start:.2f}s")
+    if not jobs:
+        print("✗ No workbooks could be read")
+        return 1
+
+    print("\n→ Parsing...")
+    parse_start = time.perf_counter()
+    parsed = {kind: [] for kind in KINDS}
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for source, kind, weeks, seconds, log in executor.map(parse_workbook, jobs):
+            if weeks is None:
+                failed += 1
+                print(f"  ✗ {source}: could not parse\n" + ''.join(f"    {line}\n" for line in log.splitlines()))
+                continue
+            parsed[kind].append(weeks)
+            print(f"  ✓ {source}: {kind}, {len(weeks)} weeks ({seconds * 1000:.0f} ms)")
+    parse_seconds = time.perf_counter() - parse_start
+
+    rows = sum(len(weeks) for files in parsed.values() for weeks in files)
+    files = len(jobs) - failed
+    print(f"✓ Parsed {files} files, {rows} weeks in {parse_seconds:.2f}s "
+          f"({files / parse_seconds:.1f} files/s, {rows / parse_seconds:.0f} rows/s)")
+    instrumentation.count('backfill.files_parsed', files)
+    instrumentation.count('backfill.rows_parsed', rows)
+
+    print("\n→ Merging into the series...")
+    series_data = liquidity.load_series()
+    for kind, files_weeks in parsed.items():
+        # Newest workbook last, so its weeks (BCV revisions) win among backfilled files
+        by_date = {}
+        for weeks in sorted(files_weeks, key=lambda ws: max((liquidity.iso_date(w['date']) or '' for w in ws), default='')):
+            for week in weeks:
+                by_date[liquidity.iso_date(week['date'])] = week
+        added = merge_backfill(series_data[kind], list(by_date.values()), KINDS[kind]['value'], args.replace)
+        weeks = series_data[kind]['weeks']
+        span = f"{weeks[-1]['date']} to {weeks[0]['date']}" if weeks else "empty"
+        print(f"  {kind}: {len(by_date)} unique weeks, {added} added ({len(weeks)} total, {span})")
+
+    if not liquidity.save_series(series_data):
+        return 1
+
+    total = time.perf_counter() - start
+    print(f"\n✓ Backfill done in {total:.2f}s ({len(jobs) / total:.1f} files/s, {rows / total:.0f} rows/s overall)")
+    return 0 if not failed and len(jobs) == len(sources) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(instrumentation.run(main, 'backfill'))
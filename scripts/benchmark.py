@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Offline Benchmark
+Times every fetcher end to end against the local stand-in server, measures
+workbook parse throughput on synthetic sheets, and records peak memory.
+Results are appended to a JSONL file keyed by commit so runs can be
+compared against the previous commit.
+
+Usage:
+  python scripts/benchmark.py
+  python scripts/benchmark.py --fail-on-regression
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+sys.path.insert(0, SCRIPTS_DIR)
+
+RESULTS_FILE = '.cache/bench/results.jsonl'
+REGRESSION_THRESHOLD = 0.25  # fraction slower (or larger) than the previous commit
+PARSE_ROWS = [10, 100, 1000, 10000]
+BASE_MAX_WEEKS = 250  # .xls sheets stop at 256 columns
+
+SCRIPTS = {
+    'rates': 'fetch_bcv_rates.py',
+    'liquidity': 'fetch_bcv_liquidity.py',
+    'hevy': 'scrape_hevy.py',
+    'pipeline': 'run_pipeline.py',
+}
+
+
+def git_commit():
+    """Short sha of HEAD, marked dirty when the tree has changes"""
+    try:
+        sha = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                      cwd=REPO_ROOT, text=True).strip()
+        dirty = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                        cwd=REPO_ROOT, text=True).strip()
+        return sha + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_script(script, workdir, env):
+    """Run a script as a subprocess; returns (exit code, seconds, peak RSS in MB)"""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(SCRIPTS_DIR, script)], cwd=workdir,
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    seconds = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux
+    return proc.returncode, seconds, usage.ru_maxrss / 1024
+
+
+def bench_scripts(server, names):
+    """Cold (empty caches) and warm (second run, validators cached) runs per script"""
+    results = {}
+    env = {**os.environ, **server.env()}
+    for name in names:
+        workdir = tempfile.mkdtemp(prefix=f'bench-{name}-')
+        try:
+            shutil.copytree(os.path.join(REPO_ROOT, 'data'), os.path.join(workdir, 'data'))
+            runs = {}
+            for phase in ('cold', 'warm'):
+                code, seconds, rss_mb = run_script(SCRIPTS[name], workdir, env)
+                runs[phase] = {'exit': code, 'ms': round(seconds * 1000, 1), 'peak_rss_mb': round(rss_mb, 1)}
+            results[name] = runs
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        cold, warm = results[name]['cold'], results[name]['warm']
+        status = "✓" if cold['exit'] == 0 and warm['exit'] == 0 else "✗"
+        print(f"  {status} {name:<10} cold {cold['ms']:>8.0f} ms  warm {warm['ms']:>8.0f} ms  "
+              f"peak {max(cold['peak_rss_mb'], warm['peak_rss_mb']):.1f} MB")
+    return results
+
+
+def bench_parsers(rows_list, repeat=3):
+    """Parse throughput of both BCV workbook parsers on synthetic sheets"""
+    from fetch_bcv_liquidity import parse_base_monetaria_excel, parse_liquidity_excel
+    from standin_server import synthetic_base_monetaria_xls, synthetic_liquidity_xls
+
+    results = {}
+    for rows in rows_list:
+        workbooks = {
+            'liquidity': (parse_liquidity_excel, synthetic_liquidity_xls(rows), rows),
+            'base': (parse_base_monetaria_excel,
+                     synthetic_base_monetaria_xls(70, weeks=min(rows, BASE_MAX_WEEKS)), min(rows, BASE_MAX_WEEKS)),
+        }
+        for kind, (parse, content, weeks) in workbooks.items():
+            best = float('inf')
+            for _ in range(repeat):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    parse(content, since='')  # since='' parses every week
+                    best = min(best, time.perf_counter() - start)
+            results[f'{kind}_{rows}'] = {'ms': round(best * 1000, 2), 'rows_per_s': round(weeks / best)}
+            print(f"  {kind:<10} {rows:>6} rows  {best * 1000:>8.1f} ms  {weeks / best:>10,.0f} weeks/s")
+    return results
+
+
+def load_results(path):
+    """Previous benchmark records, oldest first"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def metrics(record):
+    """Flatten a record into {name: value} for comparison (lower is better)"""
+    flat = {}
+    for name, runs in record.get('scripts', {}).items():
+        for phase, run in runs.items():
+            flat[f'{name}.{phase}.ms'] = run['ms']
+            flat[f'{name}.{phase}.peak_rss_mb'] = run['peak_rss_mb']
+    for name, parse in record.get('parse', {}).items():
+        flat[f'parse.{name}.ms'] = parse['ms']
+    return flat
+
+
+def compare(previous, current, threshold):
+    """Metrics that got worse than `threshold` since the previous record"""
+    old, new = metrics(previous), metrics(current)
+    regressions = []
+    for name, value in sorted(new.items()):
+        base = old.get(name)
+        if base and value > base * (1 + threshold):
+            regressions.append((name, base, value))
+    return regressions
+
+
+def main(argv=None):
+    """Main execution"""
+    parser = argparse.ArgumentParser(description='Benchmark the fetchers offline')
+    parser.add_argument('--scripts', default=','.join(SCRIPTS),
+                        help=f"comma-separated scripts to time (default: {','.join(SCRIPTS)})")
+    parser.add_argument('--rows', default=','.join(str(r) for r in PARSE_ROWS),
+                        help='comma-separated synthetic workbook sizes')
+    parser.add_argument('--latency-ms', type=float, default=0,
+                        help='latency the stand-in server adds to every response')
+    parser.add_argument('--fixtures-dir', help='directory with recorded fixtures (default: scripts/fixtures)')
+    parser.add_argument('--results', default=RESULTS_FILE, help=f'results file (default: {RESULTS_FILE})')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='regression threshold as a fraction (default: %(default)s)')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='exit 1 when a metric regressed against the previous commit')
+    args = parser.parse_args(argv)
+
+    try:
+        import xlwt  # noqa: F401
+    except ImportError:
+        print("✗ xlwt not installed. Run: pip install xlwt")
+        return 1
+    from standin_server import FIXTURES_DIR, StandinServer
+
+    names = [s.strip() for s in args.scripts.split(',') if s.strip()]
+    unknown = [s for s in names if s not in SCRIPTS]
+    if unknown:
+        print(f"✗ Unknown scripts: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    commit = git_commit()
+    print("=" * 50)
+    print(f"Offline Benchmark ({commit})")
+    print("=" * 50)
+
+    server = StandinServer(fixtures_dir=args.fixtures_dir or FIXTURES_DIR, latency_ms=args.latency_ms).start()
+    print(f"\n→ Stand-in server at {server.base_url}")
+    print("\n→ End-to-end runs...")
+    try:
+        scripts = bench_scripts(server, names)
+    finally:
+        server.stop()
+
+    print("\n→ Parse throughput...")
+    parse = bench_parsers([int(r) for r in args.rows.split(',') if r.strip()])
+
+    record = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'scripts': scripts,
+        'parse': parse,
+    }
+
+    # Compare against the latest record from a different commit
+    history = load_results(args.results)
+    previous = next((r for r in reversed(history) if r['commit'].split('-')[0] != commit.split('-')[0]), None)
+
+    os.makedirs(os.path.dirname(args.results) or '.', exist_ok=True)
+    with open(args.results, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, separators=(',', ':')) + '\n')
+    print(f"\n✓ Results appended to {args.results}")
+
+    if previous is None:
+        print("  No earlier commit to compare against")
+        return 0
+
+    regressions = compare(previous, record, args.threshold)
+    if not regressions:
+        print(f"✓ No regressions against {previous['commit']} (threshold {args.threshold:.0%})")
+        return 0
+
+    print(f"✗ {len(regressions)} regressions against {previous['commit']}:")
+    for name, base, value in regressions:
+        print(f"  {name}: {base} → {value} ({(value / base - 1) * 100:+.0f}%)")
+    return 1 if args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
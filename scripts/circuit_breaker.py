@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Circuit Breakers
+Per-source failure memory that survives between runs. After
+FAILURE_THRESHOLD consecutive failures a source's breaker opens and the
+source is skipped until its cooldown has passed; then one trial request
+is let through (half-open). A success closes the breaker, a failure
+reopens it with a doubled cooldown.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from instrumentation import count
+
+BREAKER_FILE = '.cache/breakers.json'
+FAILURE_THRESHOLD = 3
+COOLDOWN = timedelta(hours=6)  # skips at least one scheduled (3-hourly) run
+MAX_COOLDOWN = timedelta(hours=24)
+
+
+class CircuitBreakers:
+    """Breaker state for every source, persisted as one JSON file"""
+
+    def __init__(self, path=BREAKER_FILE, threshold=FAILURE_THRESHOLD,
+                 cooldown=COOLDOWN, max_cooldown=MAX_COOLDOWN):
+        self.path = path
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self.state = self._load()
+        self._touched = set()  # Sources this process changed; save() writes only these
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load circuit breakers: {e}")
+        return {}
+
+    def allow(self, source):
+        """True if the source may be called (closed, or open but cooled down)"""
+        with self._lock:
+            breaker = self.state.get(source)
+            if not breaker or not breaker.get('open_until'):
+                return True
+            if datetime.now() >= datetime.fromisoformat(breaker['open_until']):
+                return True
+        count(f'breaker.skipped.{source}')
+        return False
+
+    def record_success(self, source):
+        with self._lock:
+            self._touched.add(source)
+            if source in self.state:
+                if self.state[source].get('open_until'):
+                    print(f"  Circuit for {source} closed again")
+                del self.state[source]
+
+    def record_failure(self, source):
+        with self._lock:
+            self._touched.add(source)
+            breaker = self.state.setdefault(source, {'failures': 0, 'cooldown_s': None, 'open_until': None})
+            breaker['failures'] += 1
+            breaker['last_failure'] = datetime.now().isoformat()
+            if breaker['failures'] < self.threshold:
+                return
+            # Opening for the first time uses the base cooldown; a failed
+            # half-open trial doubles it
+            if breaker['open_until']:
+                cooldown = min(timedelta(seconds=breaker['cooldown_s'] * 2), self.max_cooldown)
+            else:
+                cooldown = self.cooldown
+            breaker['cooldown_s'] = cooldown.total_seconds()
+            breaker['open_until'] = (datetime.now() + cooldown).isoformat()
+        count(f'breaker.opened.{source}')
+        print(f"  Circuit for {source} open for {cooldown} after {breaker['failures']} failures")
+
+    def save(self):
+        """Persist breaker state for the next run
+
+        Only the sources this process recorded are written; the others
+        keep what is on disk, so stages saving at different times do not
+        undo each other. The file is replaced atomically.
+        """
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with self._lock:
+                state = self._load()
+                for source in self._touched:
+                    if source in self.state:
+                        state[source] = self.state[source]
+                    else:
+                        state.pop(source, None)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, indent=2)
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Warning: Could not save circuit breakers: {e}")
+
+_breakers = None
+_breakers_lock = threading.Lock()
+
+
+def get_breakers():
+    """Return the process-wide breaker set"""
+    global _breakers
+    with _breakers_lock:
+        if _breakers is None:
+            _breakers = CircuitBreakers()
+        return _breakers
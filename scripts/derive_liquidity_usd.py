@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Liquidity in Dollars
+Joins each liquidity and base monetaria week with the latest exchange
+rate sample at or before it (an as-of join on the binary rate series)
+and derives, in one vectorized pass per series:
+- the stock in millions of USD at the official and the P2P (USDT) rate
+- weekly growth in Bs, USD depreciation, and growth in USD terms, each
+  against the previous calendar week (empty after a gap in the series)
+
+Weeks without a rate seen in the MAX_RATE_AGE before them (e.g. weeks
+older than the rate history) are left out; a run of unchanged samples
+counts as seen until its last sample.
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from artifacts import history_layout, publish_json
+import fetch_bcv_liquidity
+from instrumentation import count, timed
+import instrumentation
+import rate_series
+import series
+
+OUTPUT_FILE = 'data/bcv-liquidity-usd.json'
+MAX_RATE_AGE = 7 * 24 * 3600  # seconds between a week and the rate used for it
+MAX_WEEK_GAP = 7 * 24 * 3600  # longest span a weekly change may cover
+
+# series section -> the value it carries (thousands of Bs.)
+SECTIONS = {'liquidity': 'm2', 'base_monetaria': 'base'}
+
+
+def week_times(dates):
+    """ISO week dates -> Unix seconds at the end of that day (UTC)"""
+    days = np.array(dates, dtype='datetime64[D]').astype('datetime64[s]')
+    return (days + np.timedelta64(86399, 's')).astype(np.int64)
+
+
+def load_rates():
+    """Records of the binary rate series and when each run was last seen
+
+    Records are run starts; a run of unchanged samples can last weeks, so
+    the rate's age is measured from its last_seen (the open run's lives
+    outside the segments). Builds the series from the store if missing.
+    """
+    from fetch_bcv_rates import open_history_store
+    store = open_history_store()
+    if not os.path.exists(rate_series.SERIES_FILE):
+        records = rate_series.rebuild(store.iter_entries())
+        print(f"  Built {rate_series.SERIES_FILE} with {records} records")
+    records = rate_series.RateSeries().records
+
+    seen = {rate_series.to_epoch(e['timestamp']): rate_series.to_epoch(e['last_seen'])
+            for e in store.iter_entries() if e.get('last_seen')}
+    ends = np.array([seen.get(int(ts), int(ts)) for ts in records['ts']], dtype=np.int64)
+    last_seen = store.last_seen()
+    if len(ends) and last_seen:
+        ends[-1] = max(ends[-1], rate_series.to_epoch(last_seen))
+    return records, ends
+
+
+def join_section(weeks, value_key, rates, ends=None, max_age=MAX_RATE_AGE):
+    """Derived rows (newest first) for one weekly series
+
+    ends holds when each rate record's run was last seen (default: its start).
+    """
+    chronological = weeks[::-1]
+    if not chronological or not len(rates):
+        return []
+    times = week_times([w['date'] for w in chronological])
+    values = series.to_array([w.get(value_key) for w in chronological])
+
+    usd = series.asof(times, rates['ts'], rates['usd'], max_age, ends)
+    usdt = series.asof(times, rates['ts'], rates['usdt'], max_age, ends)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # thousands of Bs. / (Bs. per USD) -> millions of USD
+        official = values / usd / 1000
+        p2p = values / usdt / 1000
+
+    # Weekly changes: only against the week right before, and only when
+    # both have a rate (a gap leaves the change empty instead of spanning it)
+    matched = ~np.isnan(usd)
+    growth = series.pct_change(values)
+    depreciation = series.pct_change(usd)
+    consecutive = np.append(False, np.diff(times) <= MAX_WEEK_GAP)
+    growth[~consecutive] = np.nan
+    depreciation[~consecutive] = np.nan
+    usd_growth = series.ratio_change(growth, depreciation)
+
+    columns = {
+        'usd_rate': series.to_list(usd, 4),
+        'usdt_rate': series.to_list(usdt, 4),
+        'usd_millions_official': series.to_list(official),
+        'usd_millions_p2p': series.to_list(p2p),
+        'growth_pct': series.to_list(growth),
+        'depreciation_pct': series.to_list(depreciation),
+        'usd_growth_pct': series.to_list(usd_growth),
+    }
+    rows = [{'date': week['date'], **{name: column[i] for name, column in columns.items()}}
+            for i, week in enumerate(chronological) if matched[i]]
+    return rows[::-1]
+
+
+@timed('derived.join')
+def derive(series_data, rates, ends=None):
+    """Derived rows per section"""
+    return {section: join_section(series_data[section]['weeks'], value_key, rates, ends)
+            for section, value_key in SECTIONS.items()}
+
+
+def main(argv=None):
+    """Main execution"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Join weekly liquidity with exchange rates')
+    parser.parse_args(argv)
+
+    print("=" * 50)
+    print("Liquidity in Dollars")
+    print("=" * 50)
+
+    print("\n→ Loading weekly series and rate samples...")
+    series_data = fetch_bcv_liquidity.load_series()
+    rates, ends = load_rates()
+    print(f"✓ {len(series_data['liquidity']['weeks'])} liquidity weeks, "
+          f"{len(series_data['base_monetaria']['weeks'])} base monetaria weeks, {len(rates)} rate samples")
+
+    derived = derive(series_data, rates, ends)
+    for section, rows in derived.items():
+        count(f'derived.{section}_weeks', len(rows))
+    if not any(derived.values()):
+        print(f"↺ No week overlaps the rate history, {OUTPUT_FILE} left as is")
+        return 0
+
+    output = {
+        'last_updated': datetime.now().isoformat(),
+        'units': {'usd_millions': 'millions_usd', 'rates': 'bs_per_usd'},
+        'max_rate_age_days': MAX_RATE_AGE // 86400,
+        **{section: history_layout(rows) for section, rows in derived.items()},
+    }
+    written = publish_json(OUTPUT_FILE, output)
+
+    latest = derived['liquidity'][0] if derived['liquidity'] else None
+    print(f"✓ {'Saved' if written else 'Unchanged'} {OUTPUT_FILE} "
+          f"({len(derived['liquidity'])} liquidity weeks, {len(derived['base_monetaria'])} base monetaria weeks)")
+    if latest:
+        print(f"  M2 {latest['date']}: {latest['usd_millions_official']} M USD (official), "
+              f"{latest['usd_millions_p2p']} M USD (P2P)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(instrumentation.run(main, 'derived'))
@@ -4,22 +4,39 @@ BCV Monetary Indicators Fetcher
 Scrapes weekly liquidity and base monetaria data from BCV website
 """
 
-import requests
+import hashlib
 import json
 import os
 import re
 import urllib3
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from artifacts import publish_json, write_json
+from circuit_breaker import get_breakers
+from http_client import get_client
+from instrumentation import count, timed
+import instrumentation
+import series
+from shards import manifest_path, publish_shards
 
 # Disable SSL warnings for BCV site (has certificate issues)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-# Output file
+# Output files
 OUTPUT_FILE = 'data/bcv-liquidity.json'
+SERIES_FILE = 'data/bcv-liquidity-series.json'  # Full weekly history, keyed by ISO date
+PARSE_CACHE_FILE = '.cache/bcv/parse-cache.json'  # Parsed weeks and layout per workbook SHA-256
+
+# Weeks before the watermark that are re-read on each run (BCV revises
+# preliminary "(*)" figures for a few weeks after publishing them)
+REVISION_WINDOW = timedelta(weeks=4)
 
-# BCV Excel URLs (direct links)
-LIQUIDITY_URL = 'https://www.bcv.org.ve/sites/default/files/indicadores_sector_monetario/liquidez_monetaria_semanal1.xls'
-BASE_MONETARIA_URL = 'https://www.bcv.org.ve/sites/default/files/indicadores_sector_monetario/base_monetaria_semanal.xls'
+# Rows searched for the base monetaria dates row (row 5 in current workbooks)
+DATES_ROW_SEARCH = 20
+
+# BCV Excel URLs (direct links; overridable from the environment, e.g. by scripts/benchmark.py)
+LIQUIDITY_URL = os.environ.get('LIQUIDITY_URL', 'https://www.bcv.org.ve/sites/default/files/indicadores_sector_monetario/liquidez_monetaria_semanal1.xls')
+BASE_MONETARIA_URL = os.environ.get('BASE_MONETARIA_URL', 'https://www.bcv.org.ve/sites/default/files/indicadores_sector_monetario/base_monetaria_semanal.xls')
 
 # Headers to mimic browser
 HEADERS = {
@@ -28,39 +45,148 @@ HEADERS = {
 }
 
 
+@timed('liquidity.download_excel')
 def download_excel(url, name):
-    """Download an Excel file"""
+    """Download an Excel file into memory
+
+    Returns (content, not_modified). When BCV answers 304 the cached copy
+    from the previous run is used and not_modified is True. While the
+    file's circuit breaker is open the download is skipped: (None, False).
+    """
+    breakers = get_breakers()
+    source = f"bcv:{name}"
+    if not breakers.allow(source):
+        print(f"→ Skipping {name} Excel file: circuit open after repeated failures")
+        return None, False
+
     try:
         print(f"→ Downloading {name} Excel file from BCV...")
-        response = requests.get(
+        response = get_client().get(
             url,
+            conditional=True,
             headers=HEADERS,
             timeout=30,
             verify=False
         )
         response.raise_for_status()
 
-        temp_file = f'/tmp/bcv_{name}.xls'
-        with open(temp_file, 'wb') as f:
-            f.write(response.content)
-
-        print(f"  ✓ Downloaded {len(response.content)} bytes")
-        return temp_file
+        if response.not_modified:
+            print(f"  ✓ Not modified since last run ({len(response.content)} bytes cached)")
+        else:
+            print(f"  ✓ Downloaded {len(response.content)} bytes")
+        breakers.record_success(source)
+        return response.content, response.not_modified
     except Exception as e:
         print(f"✗ Error downloading {name} Excel: {e}")
+        breakers.record_failure(source)
+        return None, False
+
+
+def open_first_sheet(source):
+    """Open a workbook from raw bytes or a file path and return (workbook, sheet)
+
+    Sheets are loaded on demand, so only the first one is ever decoded.
+    """
+    import xlrd
+
+    if isinstance(source, (bytes, bytearray)):
+        workbook = xlrd.open_workbook(file_contents=source, on_demand=True)
+    else:
+        workbook = xlrd.open_workbook(source, on_demand=True)
+    return workbook, workbook.sheet_by_index(0)
+
+
+def parse_variation_cell(var_cell):
+    """Parse a 'Variación %' cell, where negatives are written as (1,23)"""
+    if isinstance(var_cell, (int, float)) and var_cell != 0:
+        return round(var_cell, 2)
+    if isinstance(var_cell, str):
+        match = re.search(r'\((\d+[.,]\d+)\)', var_cell)
+        if match:
+            return -float(match.group(1).replace(',', '.'))
+        match = re.search(r'(\d+[.,]\d+)', var_cell)
+        if match:
+            return float(match.group(1).replace(',', '.'))
+    return None
+
+
+def iso_date(date_str):
+    """'14/08/2026' (possibly with '(*)' marks) -> '2026-08-14', or None"""
+    match = re.search(r'(\d{2})/(\d{2})/(\d{4})', str(date_str))
+    if not match:
         return None
+    day, month, year = match.groups()
+    return f"{year}-{month}-{day}"
 
 
-def parse_liquidity_excel(file_path):
-    """Parse the liquidity Excel file to extract data"""
-    try:
-        import xlrd
+def is_date_cell(cells, index):
+    """True if cells[index] is a 'dd/mm/yyyy' string (marks such as '(*)' allowed)"""
+    if index < 0 or index >= len(cells):
+        return False
+    return bool(re.match(r'\d{2}/\d{2}/\d{4}', str(cells[index]).strip()))
+
+
+def is_usos_cell(cell):
+    """True for the label of the USOS (total Base Monetaria) row"""
+    cell = str(cell).strip().upper()
+    return cell == 'USOS' or cell.startswith('USOS:')
+
+
+def date_texts(values, types, datemode):
+    """Cell values with date-typed cells (older workbooks) written as 'dd/mm/yyyy'"""
+    import xlrd
+
+    return [xlrd.xldate_as_datetime(value, datemode).strftime('%d/%m/%Y')
+            if ctype == xlrd.XL_CELL_DATE else value
+            for value, ctype in zip(values, types)]
+
+
+# Current liquidity workbook: Dinero (M1), Liquidez Monetaria (M2), Variación %
+LIQUIDITY_COLUMNS = {'m1': 4, 'm2': 6, 'variation': 7}
+
+
+def liquidity_columns(sheet, data_start):
+    """Locate the M1, M2 and variation columns from the header rows
+
+    Older workbooks have other column orders. Falls back to
+    LIQUIDITY_COLUMNS unless both M1 and M2 headers are found.
+    """
+    headers = {}
+    for row in range(data_start):
+        for col, cell in enumerate(sheet.row_values(row)):
+            if col and isinstance(cell, str) and cell.strip():
+                headers[col] = headers.get(col, '') + ' ' + cell.strip().upper()
 
+    def find(needle):
+        return next((col for col, text in sorted(headers.items()) if needle in text), None)
+
+    columns = {'m1': find('M1'), 'm2': find('M2'), 'variation': find('VARIACI')}
+    if columns['m1'] is None or columns['m2'] is None:
+        return dict(LIQUIDITY_COLUMNS)
+    return columns
+
+
+def display_date(iso):
+    """'2026-08-14' -> '14/08/2026'"""
+    year, month, day = iso.split('-')
+    return f"{day}/{month}/{year}"
+
+
+@timed('liquidity.parse_liquidity')
+def parse_liquidity_excel(source, since=None, layout=None):
+    """Parse the liquidity Excel file (bytes or path) to extract data
+
+    Without `since` only the 10 most recent weeks are returned; with an
+    ISO date every week after it is returned (an empty string reads the
+    whole history). A `layout` dict from an earlier parse skips the search
+    for the first data row when it still holds; it is updated in place
+    with the layout found.
+    """
+    try:
         print("→ Parsing liquidity Excel file...")
-        workbook = xlrd.open_workbook(file_path)
-        sheet = workbook.sheet_by_index(0)
+        workbook, sheet = open_first_sheet(source)
 
-        # Column structure:
+        # Column structure (current workbooks; older ones are located by header):
         # 0: Semana (date)
         # 1: Monedas y Billetes
         # 2: Depósitos a la Vista
@@ -70,68 +196,70 @@ def parse_liquidity_excel(file_path):
         # 6: Liquidez Monetaria (M2)
         # 7: Variación %
 
-        # Find the data rows (start after header rows)
-        data_start = None
-        for row_idx in range(sheet.nrows):
-            cell = sheet.cell_value(row_idx, 0)
-            if isinstance(cell, str) and re.match(r'\d{2}/\d{2}/\d{4}', cell.strip()):
-                data_start = row_idx
-                break
+        # Find the data rows (start after header rows) in the date column;
+        # older workbooks store the weeks as date cells instead of text
+        date_col = date_texts(sheet.col_values(0), sheet.col_types(0), workbook.datemode)
+        hint = layout or {}
+        data_start = hint.get('data_start')
+        columns = hint.get('columns')
+        if (data_start is None or columns is None
+                or not (is_date_cell(date_col, data_start) and not is_date_cell(date_col, data_start - 1))):
+            data_start = next((i for i in range(len(date_col)) if is_date_cell(date_col, i)), None)
+            columns = liquidity_columns(sheet, data_start) if data_start is not None else None
+        elif layout is not None:
+            count('liquidity.layout_reused')
 
         if data_start is None:
             print("✗ Could not find data rows in liquidity file")
+            workbook.release_resources()
             return None
+        if layout is not None:
+            layout.update({'data_start': data_start, 'columns': columns})
+
+        # Read only the M1, M2 and variation columns in bulk: the most recent
+        # weeks (first 10 data rows), or every row when merging history
+        data_end = sheet.nrows if since is not None else min(data_start + 10, sheet.nrows)
+        dates = date_col[data_start:data_end]
+        m1_values = sheet.col_values(columns['m1'], data_start, data_end)
+        m2_values = sheet.col_values(columns['m2'], data_start, data_end)
+        var_col = columns.get('variation')
+        var_values = (sheet.col_values(var_col, data_start, data_end)
+                      if var_col is not None and sheet.ncols > var_col else [None] * len(dates))
+        workbook.release_resources()
 
-        # Get the most recent weeks (first 10 data rows)
         weeks = []
-        for row_idx in range(data_start, min(data_start + 10, sheet.nrows)):
+        for offset, (date_str, m1, m2, var_cell) in enumerate(zip(dates, m1_values, m2_values, var_values)):
             try:
-                date_str = sheet.cell_value(row_idx, 0)
                 if not date_str or not isinstance(date_str, str):
                     continue
+                if since is not None and (iso_date(date_str) or '') <= since:
+                    continue
 
                 # Clean date string
                 date_str = re.sub(r'[\s*()]+', '', date_str.strip())
 
-                # Parse values
-                m1 = sheet.cell_value(row_idx, 4)  # Dinero (M1)
-                m2 = sheet.cell_value(row_idx, 6)  # Liquidez Monetaria (M2)
-
-                # Get variation if available
-                variation = None
-                if sheet.ncols > 7:
-                    var_cell = sheet.cell_value(row_idx, 7)
-                    if isinstance(var_cell, (int, float)) and var_cell != 0:
-                        variation = round(var_cell, 2)
-                    elif isinstance(var_cell, str):
-                        match = re.search(r'\((\d+[.,]\d+)\)', var_cell)
-                        if match:
-                            variation = -float(match.group(1).replace(',', '.'))
-                        else:
-                            match = re.search(r'(\d+[.,]\d+)', var_cell)
-                            if match:
-                                variation = float(match.group(1).replace(',', '.'))
-
                 weeks.append({
                     'date': date_str,
                     'm1': round(m1, 2) if isinstance(m1, (int, float)) else None,
                     'm2': round(m2, 2) if isinstance(m2, (int, float)) else None,
-                    'variation': variation
+                    'variation': parse_variation_cell(var_cell)
                 })
 
             except Exception as e:
-                print(f"  Warning: Error parsing liquidity row {row_idx}: {e}")
+                print(f"  Warning: Error parsing liquidity row {data_start + offset}: {e}")
                 continue
 
-        # Calculate variations if not provided
-        for i, week in enumerate(weeks):
-            if week['variation'] is None and i < len(weeks) - 1:
-                current_m2 = week['m2']
-                previous_m2 = weeks[i + 1]['m2']
-                if current_m2 and previous_m2 and previous_m2 > 0:
-                    week['variation'] = round(((current_m2 - previous_m2) / previous_m2) * 100, 2)
+        # Older workbooks list the weeks oldest first
+        weeks.sort(key=lambda w: iso_date(w['date']) or '', reverse=True)
+
+        # Calculate variations if not provided (weeks are newest first)
+        m2_changes = series.to_list(series.pct_change([w['m2'] for w in reversed(weeks)]))[::-1]
+        for week, change in zip(weeks, m2_changes):
+            if week['variation'] is None:
+                week['variation'] = change
 
         print(f"  ✓ Parsed {len(weeks)} weeks of liquidity data")
+        count('liquidity.rows_parsed', len(weeks))
         return weeks
 
     except ImportError:
@@ -144,8 +272,14 @@ def parse_liquidity_excel(file_path):
         return None
 
 
-def parse_base_monetaria_excel(file_path):
-    """Parse the base monetaria Excel file to extract data
+@timed('liquidity.parse_base_monetaria')
+def parse_base_monetaria_excel(source, since=None, layout=None):
+    """Parse the base monetaria Excel file (bytes or path) to extract data
+
+    Without `since` only the 10 most recent weeks are returned; with an
+    ISO date every week after it is returned. A `layout` dict (dates row,
+    USOS row, date columns) from an earlier parse is checked and reused
+    instead of searching; it is updated in place with the layout found.
 
     This file has a different structure:
     - Row 5 contains dates as column headers (e.g., "02/01/2026 (*)")
@@ -153,56 +287,73 @@ def parse_base_monetaria_excel(file_path):
     - Data is organized as rows (categories) vs columns (dates)
     """
     try:
-        import xlrd
-
         print("→ Parsing base monetaria Excel file...")
-        workbook = xlrd.open_workbook(file_path)
-        sheet = workbook.sheet_by_index(0)
-
-        # Find the dates row (usually row 5, contains dates like "02/01/2026 (*)")
-        dates_row = None
-        for row_idx in range(10):
-            cell = str(sheet.cell_value(row_idx, 1)).strip()
-            if re.match(r'\d{2}/\d{2}/\d{4}', cell):
-                dates_row = row_idx
-                break
-
-        if dates_row is None:
-            print("✗ Could not find dates row in base monetaria file")
-            return None
-
-        # Find the USOS row (contains total Base Monetaria)
-        usos_row = None
-        for row_idx in range(sheet.nrows):
-            cell = str(sheet.cell_value(row_idx, 0)).strip().upper()
-            if cell == 'USOS' or cell.startswith('USOS:'):
-                usos_row = row_idx
-                break
-
-        if usos_row is None:
-            print("✗ Could not find USOS (Base Monetaria total) row")
-            return None
-
-        print(f"  Found dates at row {dates_row}, USOS at row {usos_row}")
-
-        # Extract data for each date column (most recent first)
-        weeks = []
-        date_cols = []
-
-        # Collect all date columns (columns 1 onwards that have dates)
-        for col_idx in range(1, sheet.ncols):
-            date_str = str(sheet.cell_value(dates_row, col_idx)).strip()
-            if re.match(r'\d{2}/\d{2}/\d{4}', date_str):
-                date_cols.append(col_idx)
+        workbook, sheet = open_first_sheet(source)
+
+        hint = layout or {}
+        dates_row, usos_row = hint.get('dates_row'), hint.get('usos_row')
+        reused = (dates_row is not None and usos_row is not None
+                  and dates_row < sheet.nrows and usos_row < sheet.nrows
+                  and is_date_cell(date_texts(sheet.row_values(dates_row, 1, 2),
+                                              sheet.row_types(dates_row, 1, 2), workbook.datemode), 0)
+                  and is_usos_cell(sheet.cell_value(usos_row, 0)))
+
+        if not reused:
+            # Find the dates row (usually row 5, contains dates like "02/01/2026 (*)";
+            # older workbooks have longer titles and date cells)
+            rows = min(DATES_ROW_SEARCH, sheet.nrows)
+            labels = date_texts(sheet.col_values(1, 0, rows), sheet.col_types(1, 0, rows), workbook.datemode)
+            dates_row = next((i for i in range(len(labels)) if is_date_cell(labels, i)), None)
+
+            if dates_row is None:
+                print("✗ Could not find dates row in base monetaria file")
+                workbook.release_resources()
+                return None
+
+            # Find the USOS row (contains total Base Monetaria)
+            usos_row = None
+            for row_idx, cell in enumerate(sheet.col_values(0)):
+                if is_usos_cell(cell):
+                    usos_row = row_idx
+                    break
+
+            if usos_row is None:
+                print("✗ Could not find USOS (Base Monetaria total) row")
+                workbook.release_resources()
+                return None
+
+            print(f"  Found dates at row {dates_row}, USOS at row {usos_row}")
+        else:
+            count('liquidity.layout_reused')
+            print(f"  Reusing layout: dates at row {dates_row}, USOS at row {usos_row}")
+
+        # Only the dates row and the USOS row are needed
+        date_cells = date_texts(sheet.row_values(dates_row), sheet.row_types(dates_row), workbook.datemode)
+        usos_cells = sheet.row_values(usos_row)
+        workbook.release_resources()
+
+        # Collect all date columns (columns 1 onwards that have dates); known
+        # columns are only re-checked, and only columns after them scanned
+        known = [c for c in hint.get('date_cols', []) if is_date_cell(date_cells, c)] if reused else []
+        first_new = known[-1] + 1 if known else 1
+        date_cols = known + [col_idx for col_idx in range(first_new, len(date_cells))
+                             if is_date_cell(date_cells, col_idx)]
+        if layout is not None:
+            layout.update({'dates_row': dates_row, 'usos_row': usos_row, 'date_cols': date_cols})
+
+        if since is None:
+            date_cols = date_cols[-10:]  # Get last 10 dates
+        else:
+            date_cols = [c for c in date_cols if (iso_date(date_cells[c]) or '') > since]
 
         # Get data in reverse order (most recent first)
-        for col_idx in reversed(date_cols[-10:]):  # Get last 10 dates
+        weeks = []
+        for col_idx in reversed(date_cols):
             try:
-                date_str = str(sheet.cell_value(dates_row, col_idx)).strip()
                 # Clean date string (remove asterisks, parentheses)
-                date_str = re.sub(r'[\s*()]+', '', date_str)
+                date_str = re.sub(r'[\s*()]+', '', str(date_cells[col_idx]).strip())
 
-                base_value = sheet.cell_value(usos_row, col_idx)
+                base_value = usos_cells[col_idx] if col_idx < len(usos_cells) else None
 
                 # Skip if value is not numeric or is placeholder
                 if not isinstance(base_value, (int, float)) or base_value < 1000:
@@ -218,15 +369,14 @@ def parse_base_monetaria_excel(file_path):
                 print(f"  Warning: Error parsing column {col_idx}: {e}")
                 continue
 
-        # Calculate variations
-        for i, week in enumerate(weeks):
-            if i < len(weeks) - 1:
-                current = week['base']
-                previous = weeks[i + 1]['base']
-                if current and previous and previous > 0:
-                    week['variation'] = round(((current - previous) / previous) * 100, 2)
+        # Calculate variations (weeks are newest first, whatever the column order)
+        weeks.sort(key=lambda w: iso_date(w['date']) or '', reverse=True)
+        base_changes = series.to_list(series.pct_change([w['base'] for w in reversed(weeks)]))[::-1]
+        for week, change in zip(weeks, base_changes):
+            week['variation'] = change
 
         print(f"  ✓ Parsed {len(weeks)} weeks of base monetaria data")
+        count('liquidity.base_weeks_parsed', len(weeks))
         return weeks
 
     except ImportError:
@@ -239,6 +389,156 @@ def parse_base_monetaria_excel(file_path):
         return None
 
 
+def load_parse_cache():
+    """Load the parse cache: {workbook: {'sha256', 'since', 'layout', 'weeks'}}"""
+    try:
+        if os.path.exists(PARSE_CACHE_FILE):
+            with open(PARSE_CACHE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not load parse cache: {e}")
+    return {}
+
+
+def save_parse_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(PARSE_CACHE_FILE), exist_ok=True)
+        with open(PARSE_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, separators=(',', ':'))
+    except IOError as e:
+        print(f"Warning: Could not save parse cache: {e}")
+
+
+def covers(cached_since, since):
+    """True if weeks parsed with cached_since include every week wanted for since"""
+    if cached_since == since:
+        return True
+    # None means "latest 10 weeks"; '' or an ISO date means "every week after it"
+    return cached_since is not None and since is not None and cached_since <= since
+
+
+def cached_parse(cache, name, content, parse, since):
+    """Parse a workbook through the cache keyed by its SHA-256
+
+    The same bytes return the stored weeks without opening the workbook;
+    changed bytes are parsed with the stored layout as a hint.
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    entry = cache.get(name) or {}
+    if entry.get('sha256') == digest and covers(entry.get('since'), since):
+        weeks = [dict(w) for w in entry['weeks']
+                 if since is None or since == entry['since'] or (iso_date(w['date']) or '') > since]
+        print(f"→ {name} workbook unchanged (sha256 {digest[:12]}), reusing {len(weeks)} parsed weeks")
+        count('liquidity.parse_cache_hits')
+        return weeks
+
+    layout = dict(entry.get('layout') or {})
+    weeks = parse(content, since=since, layout=layout)
+    if weeks is not None:
+        cache[name] = {'sha256': digest, 'since': since, 'layout': layout, 'weeks': [dict(w) for w in weeks]}
+    return weeks
+
+
+def load_series():
+    """Load the stored weekly series"""
+    try:
+        if os.path.exists(SERIES_FILE):
+            with open(SERIES_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not load liquidity series: {e}")
+    return {
+        'liquidity': {'watermark': None, 'weeks': []},
+        'base_monetaria': {'watermark': None, 'weeks': []}
+    }
+
+
+def parse_since(section):
+    """ISO date to parse from: the watermark minus the revision window, or '' for everything"""
+    if not section.get('watermark'):
+        return ''
+    watermark = datetime.strptime(section['watermark'], '%Y-%m-%d')
+    return (watermark - REVISION_WINDOW).strftime('%Y-%m-%d')
+
+
+def merge_weeks(section, new_weeks, value_key):
+    """Merge parsed weeks into a stored series section (newest first)
+
+    Weeks are keyed by ISO date, so re-parsed weeks replace stored ones.
+    Variations still missing after the merge (e.g. the oldest newly parsed
+    week) are computed across the whole merged series.
+    """
+    by_date = {w['date']: w for w in section['weeks']}
+    for week in new_weeks or []:
+        iso = iso_date(week['date'])
+        if iso:
+            by_date[iso] = {**week, 'date': iso}
+
+    weeks = [by_date[d] for d in sorted(by_date, reverse=True)]
+    changes = series.to_list(series.pct_change([w[value_key] for w in reversed(weeks)]))[::-1]
+    for week, change in zip(weeks, changes):
+        if week['variation'] is None:
+            week['variation'] = change
+
+    section['weeks'] = weeks
+    section['watermark'] = weeks[0]['date'] if weeks else None
+    return weeks
+
+
+def publish_liquidity_shards(series_data):
+    """Publish both weekly series split by month
+
+    BCV revises recent weeks, so every month is passed; shards whose
+    content did not change are left alone.
+    """
+    months = {}
+    for section in ('liquidity', 'base_monetaria'):
+        for week in series_data[section]['weeks']:
+            months.setdefault(week['date'][:7], {'liquidity': [], 'base_monetaria': []})[section].append(week)
+
+    shards = {}
+    for month, sections in months.items():
+        for weeks in sections.values():
+            weeks.sort(key=lambda w: w['date'])
+        dates = [w['date'] for weeks in sections.values() for w in weeks]
+        shards[month] = {
+            'first': min(dates),
+            'last': max(dates),
+            'count': len(dates),
+            'units': 'thousands_bs',
+            **sections,
+        }
+    return publish_shards('liquidity', shards)
+
+
+@timed('liquidity.save_series')
+def save_series(series_data):
+    """Save the full weekly series (values in thousands of Bs.)"""
+    try:
+        output = {
+            'last_updated': datetime.now().isoformat(),
+            'units': 'thousands_bs',
+            'liquidity': series_data['liquidity'],
+            'base_monetaria': series_data['base_monetaria']
+        }
+        written = write_json(SERIES_FILE, output, indent=None, separators=(',', ':'))
+        print(f"✓ Series {'saved to' if written else 'unchanged in'} {SERIES_FILE} "
+              f"({len(series_data['liquidity']['weeks'])} liquidity weeks, "
+              f"{len(series_data['base_monetaria']['weeks'])} base monetaria weeks)")
+        sharded = publish_liquidity_shards(series_data)
+        if sharded:
+            print(f"  {len(sharded)} monthly shards written ({sharded[0]} to {sharded[-1]})")
+        return True
+    except Exception as e:
+        print(f"✗ Error saving series: {e}")
+        return False
+
+
+def recent_weeks(weeks, count=10):
+    """Newest weeks of a series with display dates, as the parsers return them"""
+    return [{**w, 'date': display_date(w['date'])} for w in weeks[:count]]
+
+
 def format_number(value):
     """Format number in billions for display"""
     if value is None:
@@ -248,6 +548,7 @@ def format_number(value):
     return round(billions, 2)
 
 
+@timed('liquidity.save_data')
 def save_data(liquidity_weeks, base_weeks):
     """Save parsed data to JSON file"""
     if not liquidity_weeks:
@@ -290,11 +591,10 @@ def save_data(liquidity_weeks, base_weeks):
         }
 
     try:
-        os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
-
-        print(f"\n✓ Data saved to {OUTPUT_FILE}")
+        if publish_json(OUTPUT_FILE, output):
+            print(f"\n✓ Data saved to {OUTPUT_FILE}")
+        else:
+            print(f"\n✓ Data unchanged, {OUTPUT_FILE} left as is")
         print(f"  Fecha: {latest_liquidity['date']}")
         print(f"  M2 (Liquidez): {format_number(latest_liquidity['m2'])} billones Bs.")
         if latest_liquidity['variation']:
@@ -315,30 +615,67 @@ def save_data(liquidity_weeks, base_weeks):
         return False
 
 
-def main():
+def main(argv=None):
     """Main execution"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Fetch BCV monetary indicators')
+    parser.parse_args(argv)
+
     print("=" * 50)
     print("BCV Monetary Indicators Fetcher")
     print("=" * 50)
 
-    # Download and parse liquidity
-    liquidity_file = download_excel(LIQUIDITY_URL, 'liquidity')
-    liquidity_weeks = None
-    if liquidity_file:
-        liquidity_weeks = parse_liquidity_excel(liquidity_file)
+    client = get_client()
 
-    # Download and parse base monetaria
-    base_file = download_excel(BASE_MONETARIA_URL, 'base_monetaria')
-    base_weeks = None
-    if base_file:
-        base_weeks = parse_base_monetaria_excel(base_file)
+    # Download both workbooks first so unchanged files can skip parsing
+    liquidity_xls, liquidity_unchanged = download_excel(LIQUIDITY_URL, 'liquidity')
+    base_xls, base_unchanged = download_excel(BASE_MONETARIA_URL, 'base_monetaria')
+    get_breakers().save()
 
-    if not liquidity_weeks:
+    # Skip only when everything built from the workbooks exists; otherwise the
+    # cached (304) copies are parsed to fill in what is missing
+    published = all(os.path.exists(path) for path in (OUTPUT_FILE, SERIES_FILE, manifest_path('liquidity')))
+    if liquidity_unchanged and base_unchanged and published:
+        print("\n✓ BCV files unchanged since last run, nothing to parse")
+        client.report()
+        return 0
+
+    # Parse only the weeks newer than each stored watermark and merge them
+    series_data = load_series()
+
+    # BCV down: keep publishing what we have rather than failing the run
+    if liquidity_xls is None and os.path.exists(OUTPUT_FILE):
+        watermark = series_data['liquidity'].get('watermark') or 'unknown'
+        print(f"\n↺ BCV unavailable, keeping {OUTPUT_FILE} as is (latest week: {watermark})")
+        count('liquidity.served_stale')
+        return 0
+
+    parse_cache = load_parse_cache()
+    liquidity_new = None
+    if liquidity_xls:
+        liquidity_new = cached_parse(parse_cache, 'liquidity', liquidity_xls, parse_liquidity_excel,
+                                     since=parse_since(series_data['liquidity']))
+
+    base_new = None
+    if base_xls:
+        base_new = cached_parse(parse_cache, 'base_monetaria', base_xls, parse_base_monetaria_excel,
+                                since=parse_since(series_data['base_monetaria']))
+    save_parse_cache(parse_cache)
+
+    liquidity_weeks = recent_weeks(merge_weeks(series_data['liquidity'], liquidity_new, 'm2'))
+    base_weeks = recent_weeks(merge_weeks(series_data['base_monetaria'], base_new, 'base'))
+
+    if liquidity_new is None or not liquidity_weeks:
         print("\n✗ Failed to get liquidity data")
         return 1
 
+    client.report()
+
     # Save to JSON
-    if save_data(liquidity_weeks, base_weeks):
+    if save_series(series_data) and save_data(liquidity_weeks, base_weeks):
+        # Only remember validators once the data they describe is published
+        client.save([LIQUIDITY_URL, BASE_MONETARIA_URL])
         print("\n✓ Monetary indicators updated successfully")
         return 0
     else:
@@ -348,4 +685,4 @@ def main():
 
 if __name__ == "__main__":
     import sys
-    sys.exit(main())
+    sys.exit(instrumentation.run(main, 'liquidity'))
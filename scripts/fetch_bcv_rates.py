@@ -5,75 +5,86 @@ Fetches EUR and USD exchange rates from BCV sources
 Updates every 3 hours via GitHub Actions
 """
 
-import requests
+import contextvars
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 
+from artifacts import history_layout, history_rows, load_json, publish_json, write_json
+from circuit_breaker import get_breakers
+from history_store import HistoryStore
+from http_client import get_client
+from instrumentation import count, timed
+import instrumentation
+from rate_providers import hedged_fetch, parse_bcvapi, parse_dolarapi
+from rate_rollups import update_rollups
+import rate_series
+import series
+from shards import open_months, publish_shards
+
 # Output files
 OUTPUT_FILE = 'data/bcv-rates.json'
 HISTORY_FILE = 'data/bcv-rates-history.json'
-MAX_HISTORY_ENTRIES = 90  # Keep ~3 months of data (updates every 3 hours = 8/day)
-
-# API endpoints
-EUR_API = 'https://bcvapi.tech/api/v1/euro/public'
-USD_API = 'https://bcvapi.tech/api/v1/dolar/public'
-USDT_API = 'https://ve.dolarapi.com/v1/dolares/paralelo'  # P2P reference rate
-
-
+HISTORY_DIR = 'data/history/rates'  # Append-only log of samples (monthly JSONL segments)
+HISTORY_RUN_FILE = '.cache/history/rates-run.json'  # Open run of unchanged samples
+MAX_HISTORY_ENTRIES = 90  # Recent entries (runs of equal samples) published in HISTORY_FILE
+ANALYTICS_WINDOW = 56  # Samples in rolling mean/volatility windows (~7 days at 8/day)
+LAST_GOOD_FILE = '.cache/rates/last-good.json'  # Served, marked stale, while a source is down
+MAX_STALE_HOURS = 48  # Older last-good values are not served; without EUR/USD the run fails
+
+# API endpoints (overridable from the environment, e.g. by scripts/benchmark.py)
+EUR_API = os.environ.get('EUR_API', 'https://bcvapi.tech/api/v1/euro/public')
+USD_API = os.environ.get('USD_API', 'https://bcvapi.tech/api/v1/dolar/public')
+USDT_API = os.environ.get('USDT_API', 'https://ve.dolarapi.com/v1/dolares/paralelo')  # P2P reference rate
+
+# Backup endpoints, fired when the primary is slow or failing (empty = none)
+EUR_API_BACKUP = os.environ.get('EUR_API_BACKUP', 'https://ve.dolarapi.com/v1/euros/oficial')
+USD_API_BACKUP = os.environ.get('USD_API_BACKUP', 'https://ve.dolarapi.com/v1/dolares/oficial')
+USDT_API_BACKUP = os.environ.get('USDT_API_BACKUP', '')
+
+# Sources per currency, in order of preference
+RATE_PROVIDERS = {
+    'EUR': [
+        {'name': 'bcvapi', 'url': EUR_API, 'parse': parse_bcvapi},
+        {'name': 'dolarapi-oficial', 'url': EUR_API_BACKUP, 'parse': parse_dolarapi},
+    ],
+    'USD': [
+        {'name': 'bcvapi', 'url': USD_API, 'parse': parse_bcvapi},
+        {'name': 'dolarapi-oficial', 'url': USD_API_BACKUP, 'parse': parse_dolarapi},
+    ],
+    'USDT': [
+        {'name': 'dolarapi-paralelo', 'url': USDT_API, 'parse': parse_dolarapi},
+        {'name': 'backup', 'url': USDT_API_BACKUP, 'parse': parse_dolarapi},
+    ],
+}
+
+# Overall deadline (seconds) for the concurrent fetch of all sources
+FETCH_DEADLINE = 12
+
+
+def provider_urls():
+    """Every configured provider URL (this stage's HTTP validators)"""
+    return [p['url'] for providers in RATE_PROVIDERS.values() for p in providers if p['url']]
+
+
+@timed('rates.fetch_eur')
 def fetch_eur_rate():
-    """Fetch EUR rate from bcvapi.tech"""
-    try:
-        response = requests.get(EUR_API, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        return {
-            'rate': float(data.get('tasa', 0)),
-            'date': data.get('fecha', datetime.now().strftime('%Y-%m-%d'))
-        }
-    except Exception as e:
-        print(f"✗ Error fetching EUR rate: {e}")
-        return None
+    """Fetch the official EUR rate (bcvapi.tech, DolarApi as backup)"""
+    return hedged_fetch('EUR', RATE_PROVIDERS['EUR'])
 
 
+@timed('rates.fetch_usd')
 def fetch_usd_rate():
-    """Fetch USD rate from bcvapi.tech (official BCV rate)"""
-    try:
-        response = requests.get(USD_API, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        return {
-            'rate': float(data.get('tasa', 0)),
-            'date': data.get('fecha', datetime.now().strftime('%Y-%m-%d'))
-        }
-    except Exception as e:
-        print(f"✗ Error fetching USD rate: {e}")
-        return None
+    """Fetch the official BCV USD rate (bcvapi.tech, DolarApi as backup)"""
+    return hedged_fetch('USD', RATE_PROVIDERS['USD'])
 
 
+@timed('rates.fetch_usdt')
 def fetch_usdt_rate():
-    """Fetch USDT rate from DolarApi.com (P2P reference)"""
-    try:
-        response = requests.get(USDT_API, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        # Parse date from ISO format
-        fecha_str = data.get('fechaActualizacion', '')
-        if fecha_str:
-            date = fecha_str.split('T')[0]
-        else:
-            date = datetime.now().strftime('%Y-%m-%d')
-
-        return {
-            'rate': float(data.get('promedio', 0)),
-            'date': date
-        }
-    except Exception as e:
-        print(f"✗ Error fetching USDT rate: {e}")
-        return None
+    """Fetch the USDT P2P reference rate (DolarApi.com)"""
+    return hedged_fetch('USDT', RATE_PROVIDERS['USDT'])
 
 
 def load_history():
@@ -81,29 +92,98 @@ def load_history():
     try:
         if os.path.exists(HISTORY_FILE):
             with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                history = json.load(f)
+            history['entries'] = history_rows(history.get('entries', []))
+            return history
     except Exception as e:
         print(f"Warning: Could not load history: {e}")
     return {'entries': []}
 
 
+def sample_key(entry):
+    """The rates that identify a sample; equal keys are stored as one run"""
+    return tuple(entry.get(currency, {}).get('rate') for currency in ('eur', 'usd', 'usdt'))
+
+
+def open_history_store():
+    """Open the append-only history store, seeding it from HISTORY_FILE once"""
+    store = HistoryStore(HISTORY_DIR, run_file=HISTORY_RUN_FILE)
+    if len(store) == 0:
+        entries = load_history().get('entries', [])
+        if entries:
+            # HISTORY_FILE is newest first; the store is chronological
+            for entry in reversed(entries):
+                store.record(entry, sample_key)
+            print(f"  Seeded history store with {len(store)} runs from {len(entries)} entries in {HISTORY_FILE}")
+    return store
+
+
 def calculate_variation(current, previous):
     """Calculate percentage variation between two rates"""
-    if previous and previous > 0:
-        return round(((current - previous) / previous) * 100, 2)
-    return 0
+    variation = series.last(series.pct_change([previous, current]))
+    return 0 if variation is None else variation
+
+
+def calculate_analytics(entries, window=ANALYTICS_WINDOW):
+    """Rolling mean/volatility per currency and the USDT premium over official USD
+
+    entries are newest first, as published in HISTORY_FILE; a run of
+    repeated samples counts once per sample.
+    """
+    chronological = [e for e in reversed(entries) for _ in range(e.get('samples', 1))]
+    rates = {
+        currency: series.to_array([e.get(currency, {}).get('rate') for e in chronological])
+        for currency in ('eur', 'usd', 'usdt')
+    }
+
+    analytics = {'window': window}
+    for currency, values in rates.items():
+        analytics[currency] = {
+            'mean': series.last(series.rolling_mean(values, window), 4),
+            'volatility_pct': series.last(series.rolling_volatility(values, window), 4),
+        }
+    analytics['usdt_premium_pct'] = series.last(series.premium(rates['usdt'], rates['usd']))
+    return analytics
+
+
+def update_rate_series(entry, store):
+    """Keep the binary series (one record per run) in step with the store
+
+    entry is the newly recorded sample, or None when it only extended a run.
+    """
+    if not os.path.exists(rate_series.SERIES_FILE):
+        records = rate_series.rebuild(store.iter_entries())
+        print(f"  Built {rate_series.SERIES_FILE} with {records} records")
+    elif entry and rate_series.append_entry(entry):
+        count('rates.series_appended')
+
+
+def publish_rate_shards(store):
+    """Publish the store's months as shards; closed months are not re-read"""
+    shards = {}
+    for month in open_months('rates', store.segment_names()):
+        entries = store.segment(month)
+        if entries:
+            shards[month] = {
+                'first': entries[0]['timestamp'],
+                'last': entries[-1]['timestamp'],
+                'count': len(entries),
+                'entries': history_layout(entries),
+            }
+    return publish_shards('rates', shards)
 
 
+@timed('rates.save_history')
 def save_history(eur_rate, usd_rate, usdt_rate=None):
-    """Save rate to history file with variation calculation"""
+    """Append rate to the history store and publish the recent entries"""
     try:
-        history = load_history()
-        entries = history.get('entries', [])
+        store = open_history_store()
+        latest = store.latest()
 
         # Get previous entry for variation calculation
-        prev_eur = entries[0]['eur']['rate'] if entries else None
-        prev_usd = entries[0]['usd']['rate'] if entries else None
-        prev_usdt = entries[0].get('usdt', {}).get('rate') if entries else None
+        prev_eur = latest['eur']['rate'] if latest else None
+        prev_usd = latest['usd']['rate'] if latest else None
+        prev_usdt = latest.get('usdt', {}).get('rate') if latest else None
 
         # Create new entry
         new_entry = {
@@ -125,22 +205,37 @@ def save_history(eur_rate, usd_rate, usdt_rate=None):
                 'variation': calculate_variation(usdt_rate, prev_usdt)
             }
 
-        # Add to beginning of list (newest first)
-        entries.insert(0, new_entry)
-
-        # Trim to max entries
-        entries = entries[:MAX_HISTORY_ENTRIES]
-
-        # Save history
+        # O(1) ingest: one appended line, or nothing when the rates did not
+        # move; closed months get compacted once
+        recorded = store.record(new_entry, sample_key)
+        if not recorded:
+            print("  Rates unchanged since the last sample, extending its run")
+        update_rate_series(new_entry if recorded else None, store)
+        compacted = store.compact()
+        store.save()
+        if compacted:
+            print(f"  Compacted {compacted} closed history segments")
+
+        # Daily/weekly OHLC artifacts for the calculator
+        update_rollups(new_entry, backfill=store.iter_entries)
+
+        # Publish the most recent entries (newest first) for the calculator
+        entries = store.tail(MAX_HISTORY_ENTRIES)
+        # Analytics count every sample of the open run, which the entry alone does not carry
+        counted = [{**entries[0], **store.open_run(entries[0])}, *entries[1:]] if entries else entries
         history_output = {
             'last_updated': datetime.now().isoformat(),
-            'entries': entries
+            'analytics': calculate_analytics(counted),
+            'entries': history_layout(entries)
         }
 
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history_output, f, ensure_ascii=False, indent=2)
+        written = publish_json(HISTORY_FILE, history_output)
+        sharded = publish_rate_shards(store)
 
-        print(f"✓ History updated ({len(entries)} entries)")
+        print(f"✓ History {'updated' if written else 'unchanged'} "
+              f"({len(store)} entries stored, {len(entries)} published)")
+        if sharded:
+            print(f"  {len(sharded)} monthly shards written ({sharded[0]} to {sharded[-1]})")
         if prev_usd:
             var_usd = calculate_variation(usd_rate, prev_usd)
             var_symbol = "↑" if var_usd > 0 else "↓" if var_usd < 0 else "="
@@ -153,51 +248,119 @@ def save_history(eur_rate, usd_rate, usdt_rate=None):
         return False
 
 
+def load_last_good():
+    """Last fresh value per currency, falling back to the history store
+
+    The fallback takes the fetch time from the store: the published rates'
+    last_updated is only rewritten when the rates change, so it can be
+    days older than the value.
+    """
+    last_good = load_json(LAST_GOOD_FILE)
+    if last_good:
+        return last_good
+    store = open_history_store()
+    latest = store.latest()
+    if not latest:
+        return {}
+    fetched_at = store.last_seen(latest)
+    published = load_json(OUTPUT_FILE) or {}
+    last_good = {}
+    for name in ('EUR', 'USD', 'USDT'):
+        sample = latest.get(name.lower())
+        if not sample or sample.get('rate') is None:
+            continue
+        # The published value date belongs to the same rate; else use the sample's day
+        shown = published.get(name.lower()) or {}
+        value_date = shown['date'] if shown.get('rate') == sample['rate'] else latest['date']
+        last_good[name] = {'rate': sample['rate'], 'date': value_date, 'fetched_at': fetched_at}
+    return last_good
+
+
+def save_last_good(results):
+    """Remember this run's fresh values for stale-while-revalidate"""
+    last_good = load_last_good()
+    now = datetime.now().isoformat()
+    for name, (data, _) in results.items():
+        if data and not data.get('stale'):
+            last_good[name] = {'rate': data['rate'], 'date': data['date'], 'fetched_at': now}
+    write_json(LAST_GOOD_FILE, last_good)
+
+
+def with_stale_fallback(results, max_age_hours=MAX_STALE_HOURS):
+    """Fill failed currencies with their last good value, marked stale
+
+    Values older than max_age_hours are not served: the currency stays missing.
+    """
+    last_good = None
+    for name, (data, latency) in results.items():
+        if data:
+            continue
+        if last_good is None:
+            last_good = load_last_good()
+        stale = last_good.get(name)
+        if not stale or not stale.get('fetched_at'):
+            continue
+        age_h = (datetime.now() - datetime.fromisoformat(stale['fetched_at'])).total_seconds() / 3600
+        if age_h > max_age_hours:
+            print(f"  ✗ {name}: last good value is {age_h:.0f} h old, past the {max_age_hours} h limit")
+            count('rates.stale_expired')
+            continue
+        print(f"  ↺ {name}: serving the value fetched {age_h:.1f} h ago")
+        count('rates.served_stale')
+        results[name] = ({**stale, 'stale': True, 'age_hours': round(age_h, 1)}, latency)
+    return results
+
+
+def rate_output(data, symbol):
+    """Published form of one rate; stale values carry when they were fetched"""
+    output = {'rate': data['rate'], 'date': data['date'], 'symbol': symbol}
+    if data.get('stale'):
+        output['stale'] = True
+        output['fetched_at'] = data['fetched_at']
+    return output
+
+
+@timed('rates.save_rates')
 def save_rates(eur_data, usd_data, usdt_data=None):
-    """Save rates to JSON file"""
+    """Save rates to JSON file
+
+    Stale values are published with their fetch time but not added to the
+    history: they are not new observations. Fresh EUR/USD are still
+    recorded when only USDT is stale.
+    """
     if not eur_data or not usd_data:
         print("✗ Missing rate data, cannot save")
         return False
 
     output = {
         'last_updated': datetime.now().isoformat(),
-        'eur': {
-            'rate': eur_data['rate'],
-            'date': eur_data['date'],
-            'symbol': '€'
-        },
-        'usd': {
-            'rate': usd_data['rate'],
-            'date': usd_data['date'],
-            'symbol': '$'
-        }
+        'eur': rate_output(eur_data, '€'),
+        'usd': rate_output(usd_data, '$')
     }
 
     # Add USDT if available
     if usdt_data:
-        output['usdt'] = {
-            'rate': usdt_data['rate'],
-            'date': usdt_data['date'],
-            'symbol': '₮'
-        }
+        output['usdt'] = rate_output(usdt_data, '₮')
 
     try:
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-
-        # Write current rates
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
-
-        print(f"✓ Rates saved successfully to {OUTPUT_FILE}")
+        # Write current rates (left alone when nothing but last_updated changed)
+        if publish_json(OUTPUT_FILE, output):
+            print(f"✓ Rates saved successfully to {OUTPUT_FILE}")
+        else:
+            print(f"✓ Rates unchanged, {OUTPUT_FILE} left as is")
         print(f"  EUR: {eur_data['rate']} Bs. (fecha: {eur_data['date']})")
         print(f"  USD: {usd_data['rate']} Bs. (fecha: {usd_data['date']})")
         if usdt_data:
             print(f"  USDT: {usdt_data['rate']} Bs. (fecha: {usdt_data['date']})")
 
-        # Save to history
-        usdt_rate = usdt_data['rate'] if usdt_data else None
-        save_history(eur_data['rate'], usd_data['rate'], usdt_rate)
+        # Save to history (fresh samples only; a stale USDT is left out of the entry)
+        if eur_data.get('stale') or usd_data.get('stale'):
+            print("  History not updated: official rates are stale")
+        else:
+            usdt_fresh = usdt_data and not usdt_data.get('stale')
+            if usdt_data and not usdt_fresh:
+                print("  USDT is stale, recorded in history without it")
+            save_history(eur_data['rate'], usd_data['rate'], usdt_data['rate'] if usdt_fresh else None)
 
         return True
 
@@ -206,28 +369,98 @@ def save_rates(eur_data, usd_data, usdt_data=None):
         return False
 
 
-def main():
+def timed_fetch(fetch_fn):
+    """Run a fetch function and return (result, latency in seconds)"""
+    start = time.perf_counter()
+    result = fetch_fn()
+    return result, time.perf_counter() - start
+
+
+def fetch_all_rates(sequential=False, deadline=FETCH_DEADLINE):
+    """Fetch EUR, USD and USDT rates
+
+    By default all three sources are requested at once, so wall-clock time is
+    set by the slowest source instead of the sum. Sources that have not
+    answered when the overall deadline expires are reported as missing.
+    Returns a dict of name -> (result, latency).
+    """
+    sources = {
+        'EUR': fetch_eur_rate,
+        'USD': fetch_usd_rate,
+        'USDT': fetch_usdt_rate,
+    }
+
+    if sequential:
+        return {name: timed_fetch(fn) for name, fn in sources.items()}
+
+    results = {}
+    executor = ThreadPoolExecutor(max_workers=len(sources))
+    try:
+        # Each in a copy of this context, so the pipeline's stage output and HTTP stats follow
+        futures = {executor.submit(contextvars.copy_context().run, timed_fetch, fn): name
+                   for name, fn in sources.items()}
+        done, _ = wait(futures, timeout=deadline)
+        for future, name in futures.items():
+            if future in done:
+                results[name] = future.result()
+            else:
+                print(f"✗ {name} source missed the {deadline}s deadline")
+                count('rates.deadline_missed')
+                results[name] = (None, None)
+    finally:
+        # Do not block on stragglers; their own request timeout bounds them
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
+
+
+def main(argv=None):
     """Main execution"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Fetch BCV exchange rates')
+    parser.add_argument('--sequential', action='store_true',
+                        help='fetch sources one after another instead of concurrently')
+    args = parser.parse_args(argv)
+
     print("=" * 50)
     print("BCV Exchange Rates Fetcher")
     print("=" * 50)
 
-    # Fetch EUR rate
-    print("\n→ Fetching EUR rate from bcvapi.tech...")
-    eur_data = fetch_eur_rate()
+    mode = "sequentially" if args.sequential else "concurrently"
+    print(f"\n→ Fetching EUR/USD (bcvapi.tech) and USDT (DolarApi.com) {mode}...")
+    run_start = time.perf_counter()
+    results = fetch_all_rates(sequential=args.sequential)
+    wall_time = time.perf_counter() - run_start
+
+    for name, (data, latency) in results.items():
+        status = "✓" if data else "✗"
+        latency_str = f"{latency * 1000:.0f} ms" if latency is not None else "timed out"
+        source_str = f" via {data['source']}" if data else ""
+        print(f"  {status} {name}: {latency_str}{source_str}")
+    print(f"  Wall-clock: {wall_time * 1000:.0f} ms")
+
+    get_breakers().save()
+    save_last_good(results)
+    results = with_stale_fallback(results)
 
-    # Fetch USD rate
-    print("→ Fetching USD rate from DolarApi.com...")
-    usd_data = fetch_usd_rate()
+    client = get_client()
+    client.report()
 
-    # Fetch USDT rate (P2P)
-    print("→ Fetching USDT rate from DolarApi.com...")
-    usdt_data = fetch_usdt_rate()
+    eur_data = results['EUR'][0]
+    usd_data = results['USD'][0]
+    usdt_data = results['USDT'][0]
 
     # Save rates
     if eur_data and usd_data:
         if save_rates(eur_data, usd_data, usdt_data):
-            print("\n✓ Exchange rates updated successfully")
+            # Only remember validators once the rates they describe are published
+            client.save(provider_urls())
+            stale = [name for name, (data, _) in results.items() if data and data.get('stale')]
+            if stale:
+                print(f"\n↺ Exchange rates published with stale values ({', '.join(stale)})")
+            else:
+                print("\n✓ Exchange rates updated successfully")
             return 0
         else:
             print("\n✗ Failed to save exchange rates")
@@ -239,4 +472,4 @@ def main():
 
 if __name__ == "__main__":
     import sys
-    sys.exit(main())
+    sys.exit(instrumentation.run(main, 'rates'))
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Hevy API Client
+Rate-limited client for the Hevy API: a token bucket paces requests,
+429/5xx answers are retried honouring Retry-After, and paginated
+endpoints are fetched in parallel by a bounded worker pool.
+"""
+
+import contextvars
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from http_client import get_client
+from instrumentation import count
+
+# Request pacing (tokens per second and burst size)
+RATE_LIMIT = 5.0
+BURST = 5
+
+MAX_WORKERS = 4
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0  # seconds, doubled on every retry when there is no Retry-After
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is free"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Drain the bucket so nobody sends anything for `seconds`"""
+        with self._lock:
+            self.tokens = -seconds * self.rate
+            self.updated = time.monotonic()
+
+
+def retry_after_seconds(response):
+    """Parse a Retry-After header (seconds or HTTP date), or None"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def endpoint_name(path):
+    """Group paths by endpoint, e.g. /exercise_templates/ABC -> /exercise_templates/{id}"""
+    return re.sub(r'^(/(?:workouts|exercise_templates))/(?!count$|events$)[^/]+$', r'\1/{id}', path)
+
+
+class HevyClient:
+    """Hevy API client with rate limiting, retries and parallel paging"""
+
+    def __init__(self, api_key, base_url, rate=RATE_LIMIT, burst=BURST,
+                 max_workers=MAX_WORKERS, max_retries=MAX_RETRIES):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.bucket = TokenBucket(rate, burst)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.http = get_client()
+        self._lock = threading.Lock()
+        self.metrics = {}
+
+    def _record(self, endpoint, latency, retries):
+        with self._lock:
+            m = self.metrics.setdefault(endpoint, {'calls': 0, 'retries': 0, 'total_s': 0.0, 'max_s': 0.0})
+            m['calls'] += 1
+            m['retries'] += retries
+            m['total_s'] += latency
+            m['max_s'] = max(m['max_s'], latency)
+
+    def get(self, path, params=None, conditional=False, timeout=15):
+        """GET an API path and return the response
+
+        Rate-limited and retried on 429/5xx and connection errors. Raises
+        requests exceptions once retries are exhausted; 404 is returned to
+        the caller, which knows whether it means "empty".
+        """
+        endpoint = endpoint_name(path)
+        retries = 0
+        start = time.perf_counter()
+        while True:
+            self.bucket.acquire()
+            try:
+                response = self.http.get(
+                    f"{self.base_url}{path}",
+                    conditional=conditional,
+                    headers={"api-key": self.api_key, "accept": "application/json"},
+                    params=params,
+                    timeout=timeout
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                count('hevy.connection_errors')
+                if retries >= self.max_retries:
+                    self._record(endpoint, time.perf_counter() - start, retries)
+                    raise
+                time.sleep(BACKOFF_BASE * 2 ** retries)
+                retries += 1
+                continue
+
+            if response.status_code in RETRY_STATUSES and retries < self.max_retries:
+                delay = retry_after_seconds(response)
+                if delay is None:
+                    delay = BACKOFF_BASE * 2 ** retries
+                if response.status_code == 429:
+                    self.bucket.pause(delay)
+                count('hevy.retries')
+                time.sleep(delay)
+                retries += 1
+                continue
+
+            self._record(endpoint, time.perf_counter() - start, retries)
+            if response.status_code != 404:
+                response.raise_for_status()
+            return response
+
+    def get_json(self, path, params=None, conditional=False):
+        """GET an API path and decode JSON; None on 404"""
+        response = self.get(path, params=params, conditional=conditional)
+        if response.status_code == 404:
+            return None
+        return response.json()
+
+    def get_pages(self, path, items_key, page_size, params=None, conditional=False):
+        """Fetch every page of a paginated endpoint
+
+        Page 1 gives page_count; the remaining pages are fetched by the
+        worker pool, paced by the shared token bucket. Returns
+        (items, complete) with items in page order.
+        """
+        def fetch(page):
+            try:
+                data = self.get_json(path, params={**(params or {}), 'page': page, 'pageSize': page_size},
+                                     conditional=conditional)
+                return (data or {}).get(items_key, []), (data or {}).get('page_count', 0)
+            except Exception as e:
+                print(f"WARNING: Could not fetch {path} page {page}: {e}")
+                return None, 0
+
+        first, page_count = fetch(1)
+        if first is None:
+            return [], False
+
+        pages = [first]
+        if page_count > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                # Each in a copy of this context, so the pipeline's stage output and HTTP stats follow
+                futures = [executor.submit(contextvars.copy_context().run, fetch, page)
+                           for page in range(2, page_count + 1)]
+                pages.extend(future.result()[0] for future in futures)
+
+        items = [item for page in pages for item in (page or [])]
+        return items, all(page is not None for page in pages)
+
+    def report(self):
+        """Print per-endpoint call counts, latency and retries"""
+        for endpoint, m in sorted(self.metrics.items()):
+            avg_ms = m['total_s'] / m['calls'] * 1000
+            print(f"  {endpoint}: {m['calls']} calls, avg {avg_ms:.0f} ms, "
+                  f"max {m['max_s'] * 1000:.0f} ms, {m['retries']} retries")
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Append-only History Store
+Keeps time-stamped samples as JSON lines in monthly segment files
+(e.g. data/history/rates/2026-05.jsonl). Each ingest appends one line;
+closed months are compacted once (sorted, de-duplicated) and left alone.
+Repeats of the newest sample are run-length encoded instead of appended.
+"""
+
+import json
+import os
+import sys
+
+
+class HistoryStore:
+    """Monthly JSONL segments plus a small index of their ranges"""
+
+    def __init__(self, root, run_file=None):
+        self.root = root
+        self.index_file = os.path.join(root, 'index.json')
+        self.index = self._load_index()
+        # Open run of repeated samples, kept outside the segments if given
+        self.run_file = run_file
+
+    def _load_index(self):
+        """Load the segment index, rebuilding it if missing"""
+        try:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load history index: {e}")
+        return self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Scan segment files on disk and recreate the index"""
+        index = {'segments': {}}
+        if not os.path.isdir(self.root):
+            return index
+        for filename in sorted(os.listdir(self.root)):
+            if not filename.endswith('.jsonl'):
+                continue
+            name = filename[:-len('.jsonl')]
+            entries = self._read_segment(name)
+            if entries:
+                index['segments'][name] = {
+                    'count': len(entries),
+                    'first': entries[0]['timestamp'],
+                    'last': entries[-1]['timestamp'],
+                    'compacted': False,
+                }
+        return index
+
+    def _segment_path(self, name):
+        return os.path.join(self.root, f'{name}.jsonl')
+
+    def _read_segment(self, name):
+        """Read a segment in file order, skipping torn or invalid lines"""
+        entries = []
+        path = self._segment_path(name)
+        if not os.path.exists(path):
+            return entries
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return entries
+
+    def segment_names(self):
+        """Segment names in chronological order"""
+        return sorted(self.index['segments'])
+
+    def __len__(self):
+        return sum(s['count'] for s in self.index['segments'].values())
+
+    def append(self, entry):
+        """Append one entry (must carry an ISO 'timestamp') to its month segment"""
+        name = entry['timestamp'][:7]
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._segment_path(name), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+        segment = self.index['segments'].setdefault(name, {
+            'count': 0,
+            'first': entry['timestamp'],
+            'last': entry['timestamp'],
+            'compacted': False,
+        })
+        segment['count'] += 1
+        segment['first'] = min(segment['first'], entry['timestamp'])
+        segment['last'] = max(segment['last'], entry['timestamp'])
+        segment['compacted'] = False
+
+    def record(self, entry, key):
+        """Store a sample, run-length encoding repeats of the newest entry
+
+        key(entry) returns the values that identify a sample. A repeat only
+        extends the open run; the run is closed, by writing 'samples' and
+        'last_seen' onto the newest entry, when a different sample arrives.
+        With a run_file the open run lives there, so a repeat writes
+        nothing to the segments. Returns True if the entry was appended.
+        """
+        latest = self.latest()
+        run = self._load_run()
+        if latest and run.get('timestamp') != latest['timestamp']:
+            run = {
+                'timestamp': latest['timestamp'],
+                'samples': latest.get('samples', 1),
+                'last_seen': latest.get('last_seen', latest['timestamp']),
+            }
+
+        if latest and key(latest) == key(entry):
+            run['samples'] += 1
+            run['last_seen'] = entry['timestamp']
+            if self.run_file:
+                self._save_run(run)
+            else:
+                self._replace_latest({**latest, 'samples': run['samples'], 'last_seen': run['last_seen']})
+            return False
+
+        if latest and run['samples'] > latest.get('samples', 1):
+            self._replace_latest({**latest, 'samples': run['samples'], 'last_seen': run['last_seen']})
+        self.append(entry)
+        if self.run_file:
+            self._save_run({})
+        return True
+
+    def _load_run(self):
+        if not self.run_file or not os.path.exists(self.run_file):
+            return {}
+        try:
+            with open(self.run_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_run(self, run):
+        os.makedirs(os.path.dirname(self.run_file) or '.', exist_ok=True)
+        with open(self.run_file, 'w', encoding='utf-8') as f:
+            json.dump(run, f)
+
+    def _replace_latest(self, entry):
+        """Rewrite the last line of the newest segment"""
+        path = self._segment_path(self.segment_names()[-1])
+        with open(path, 'rb+') as f:
+            content = f.read().rstrip(b'\n')
+            f.seek(content.rfind(b'\n') + 1)
+            f.truncate()
+            f.write((json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8'))
+
+    def latest(self):
+        """Return the newest entry by reading only the tail of the last segment"""
+        for name in reversed(self.segment_names()):
+            path = self._segment_path(name)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                chunk = 4096
+                while True:
+                    f.seek(max(0, size - chunk))
+                    lines = f.read().splitlines()
+                    # The first line may be cut unless we reached the file start
+                    candidates = lines if chunk >= size else lines[1:]
+                    for line in reversed(candidates):
+                        try:
+                            return json.loads(line)
+                        except ValueError:
+                            continue
+                    if chunk >= size:
+                        break
+                    chunk *= 4
+        return None
+
+    def open_run(self, latest=None):
+        """The newest entry's run so far: {'samples', 'last_seen'} (None if empty)
+
+        Repeats only extend the open run, which lives in the run file (or on
+        the entry itself without one), so the entry alone undercounts it.
+        """
+        latest = latest or self.latest()
+        if not latest:
+            return None
+        run = self._load_run()
+        if run.get('timestamp') == latest['timestamp']:
+            return {'samples': run['samples'], 'last_seen': run['last_seen']}
+        return {'samples': latest.get('samples', 1), 'last_seen': latest.get('last_seen', latest['timestamp'])}
+
+    def last_seen(self, latest=None):
+        """When the newest entry's rates were last observed (None if empty)
+
+        Repeats only extend the open run, so this is later than the
+        newest entry's timestamp whenever the rates have not moved.
+        """
+        run = self.open_run(latest)
+        return run['last_seen'] if run else None
+
+    def tail(self, n):
+        """Return the newest n entries, newest first"""
+        result = []
+        for name in reversed(self.segment_names()):
+            entries = self._read_segment(name)
+            entries.sort(key=lambda e: e['timestamp'])
+            result.extend(reversed(entries))
+            if len(result) >= n:
+                break
+        return result[:n]
+
+    def segment(self, name):
+        """Return one month's entries in chronological order"""
+        entries = self._read_segment(name)
+        entries.sort(key=lambda e: e['timestamp'])
+        return entries
+
+    def iter_entries(self):
+        """Yield every entry in chronological order"""
+        for name in self.segment_names():
+            yield from self.segment(name)
+
+    def compact(self):
+        """Sort and de-duplicate every closed segment that has not been compacted
+
+        The newest segment is still receiving appends and is left as is.
+        Returns the number of segments rewritten.
+        """
+        names = self.segment_names()
+        compacted = 0
+        for name in names[:-1]:
+            segment = self.index['segments'][name]
+            if segment['compacted']:
+                continue
+
+            unique = {}
+            for entry in self._read_segment(name):
+                unique[entry['timestamp']] = entry
+            entries = [unique[ts] for ts in sorted(unique)]
+
+            path = self._segment_path(name)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            os.replace(tmp_path, path)
+
+            segment.update({
+                'count': len(entries),
+                'first': entries[0]['timestamp'] if entries else segment['first'],
+                'last': entries[-1]['timestamp'] if entries else segment['last'],
+                'compacted': True,
+            })
+            compacted += 1
+        return compacted
+
+    def save(self):
+        """Persist the segment index"""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_file)
+
+
+def main():
+    """Compact a history store: python scripts/history_store.py <dir>"""
+    if len(sys.argv) != 2:
+        print("Usage: python scripts/history_store.py <history dir>", file=sys.stderr)
+        return 1
+
+    store = HistoryStore(sys.argv[1])
+    rewritten = store.compact()
+    store.save()
+    print(f"✓ Compacted {rewritten} segments ({len(store)} entries in {len(store.segment_names())} segments)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
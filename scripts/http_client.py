@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the data fetchers
+Keeps connections alive across requests and remembers ETag/Last-Modified
+validators between runs so unchanged resources come back as 304
+"""
+
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import count
+
+# On-disk cache (restored between CI runs with actions/cache)
+CACHE_DIR = '.cache/http'
+
+# Connection pool size per host
+POOL_SIZE = 10
+
+# Stats of the current scope (a pipeline stage), next to the client-wide ones
+_scoped_stats = contextvars.ContextVar('http_scoped_stats', default=None)
+
+
+def empty_stats():
+    return {'requests': 0, 'not_modified': 0, 'bytes_downloaded': 0, 'bytes_saved': 0}
+
+
+@contextlib.contextmanager
+def scoped_stats():
+    """Count the requests made in this context apart from the rest
+
+    Stages share one client, so the pipeline runs each in its own scope and
+    report() shows only that stage's traffic. Worker threads are counted
+    when started in a copy of the context (contextvars.copy_context()).
+    """
+    token = _scoped_stats.set(empty_stats())
+    try:
+        yield
+    finally:
+        _scoped_stats.reset(token)
+
+
+class HttpClient:
+    """Pooled requests.Session with conditional GET support"""
+
+    def __init__(self, cache_dir=CACHE_DIR, pool_size=POOL_SIZE):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.cache_dir = cache_dir
+        self.validators_file = os.path.join(cache_dir, 'validators.json')
+        self.bodies_dir = os.path.join(cache_dir, 'bodies')
+        self.validators = self._load_validators()
+
+        self._lock = threading.Lock()
+        self.stats = empty_stats()
+
+    def _load_validators(self):
+        """Load stored validators from disk"""
+        try:
+            if os.path.exists(self.validators_file):
+                with open(self.validators_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load HTTP validators: {e}")
+        return {}
+
+    def _body_path(self, url):
+        return os.path.join(self.bodies_dir, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def get(self, url, conditional=False, **kwargs):
+        """GET a URL through the shared session
+
+        With conditional=True the stored validators are sent as
+        If-None-Match/If-Modified-Since. A 304 answer gets the cached body
+        attached and is flagged with response.not_modified = True, so callers
+        can skip their parse step.
+        """
+        headers = dict(kwargs.pop('headers', None) or {})
+        # Validators are keyed by the full URL so paginated queries stay apart
+        key = requests.Request('GET', url, params=kwargs.get('params')).prepare().url
+        body_path = self._body_path(key)
+
+        with self._lock:
+            stored = self.validators.get(key) if conditional else None
+        if stored and os.path.exists(body_path):
+            if stored.get('etag'):
+                headers['If-None-Match'] = stored['etag']
+            if stored.get('last_modified'):
+                headers['If-Modified-Since'] = stored['last_modified']
+        else:
+            stored = None
+
+        response = self.session.get(url, headers=headers, **kwargs)
+        response.not_modified = False
+        count(f'http.status.{response.status_code}')
+
+        if response.status_code == 304 and stored:
+            with open(body_path, 'rb') as f:
+                response._content = f.read()
+            response.not_modified = True
+            self._add_stats(requests=1, not_modified=1, bytes_saved=len(response.content))
+            count('http.bytes_saved', len(response.content))
+            return response
+
+        self._add_stats(requests=1, bytes_downloaded=len(response.content))
+        count('http.bytes_downloaded', len(response.content))
+
+        if conditional and response.ok:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                os.makedirs(self.bodies_dir, exist_ok=True)
+                with open(body_path, 'wb') as f:
+                    f.write(response.content)
+                with self._lock:
+                    self.validators[key] = {'etag': etag, 'last_modified': last_modified}
+
+        return response
+
+    def _add_stats(self, **amounts):
+        with self._lock:
+            for stats in (self.stats, _scoped_stats.get()):
+                if stats is not None:
+                    for key, amount in amounts.items():
+                        stats[key] += amount
+
+    def save(self, prefixes=None):
+        """Persist validators for the next run
+
+        With prefixes, only validators for URLs starting with one of them
+        are written; the others keep what is on disk. Stages share one
+        client, so each saves just its own URLs once its data is published.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with self._lock:
+                validators = self._load_validators() if prefixes is not None else {}
+                validators.update({url: v for url, v in self.validators.items()
+                                   if prefixes is None or url.startswith(tuple(prefixes))})
+                tmp_path = self.validators_file + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(validators, f, indent=2)
+                os.replace(tmp_path, self.validators_file)
+        except Exception as e:
+            print(f"Warning: Could not save HTTP validators: {e}")
+
+    def report(self):
+        """Print what this run (or the current scope) transferred and what conditional GETs saved"""
+        s = _scoped_stats.get() or self.stats
+        print(f"  HTTP: {s['requests']} requests, {s['bytes_downloaded']:,} bytes downloaded")
+        if s['not_modified']:
+            print(f"  Saved: {s['not_modified']} downloads ({s['bytes_saved']:,} bytes) via 304 Not Modified")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide shared client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Run Instrumentation
+Timing spans and counters shared by the fetch scripts. Stages are wrapped
+with @timed('stage.name') or `with span('stage.name')`, counters are
+bumped with count(), and every run writes a metrics JSON to
+.cache/metrics/<script>.json.
+
+Set FETCH_PROFILE=cpu to add a cProfile summary (and a .prof file) or
+FETCH_PROFILE=memory to add tracemalloc peak and top allocation sites.
+"""
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_DIR = os.environ.get('FETCH_METRICS_DIR', '.cache/metrics')
+PROFILE_MODES = ('cpu', 'memory')
+PROFILE_TOP = 20
+
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+_profile_stats = []
+
+
+@contextmanager
+def span(name):
+    """Time a block; repeated spans with the same name are aggregated"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            s = _spans.setdefault(name, {'calls': 0, 'total_s': 0.0, 'max_s': 0.0})
+            s['calls'] += 1
+            s['total_s'] += elapsed
+            s['max_s'] = max(s['max_s'], elapsed)
+
+
+def timed(name):
+    """Decorator form of span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """Add `value` to a counter"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def profile_mode():
+    """Requested profiling mode ('cpu', 'memory') or None"""
+    mode = os.environ.get('FETCH_PROFILE', '').strip().lower()
+    return mode if mode in PROFILE_MODES else None
+
+
+@contextmanager
+def profiled():
+    """cProfile the current thread when FETCH_PROFILE=cpu
+
+    cProfile only sees the thread that enabled it, so the pipeline wraps
+    each stage thread as well; their stats are merged at the end.
+    """
+    if profile_mode() != 'cpu':
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active in this process
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        with _lock:
+            _profile_stats.append(profiler)
+
+
+def snapshot():
+    """Current spans and counters as plain dicts"""
+    with _lock:
+        spans = {name: {'calls': s['calls'],
+                        'total_ms': round(s['total_s'] * 1000, 1),
+                        'max_ms': round(s['max_s'] * 1000, 1)}
+                 for name, s in sorted(_spans.items())}
+        return {'spans': spans, 'counters': dict(sorted(_counters.items()))}
+
+
+def cpu_summary(prof_path):
+    """Merge collected profiles, dump them to prof_path and return the top entries"""
+    with _lock:
+        profilers = list(_profile_stats)
+    if not profilers:
+        return None
+    stats = pstats.Stats(profilers[0], stream=io.StringIO())
+    for profiler in profilers[1:]:
+        stats.add(profiler)
+    os.makedirs(os.path.dirname(prof_path) or '.', exist_ok=True)
+    stats.dump_stats(prof_path)
+
+    top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+    return {
+        'file': prof_path,
+        'top_cumulative': [{
+            'function': f"{os.path.basename(filename)}:{line}({func})",
+            'calls': calls,
+            'self_ms': round(self_s * 1000, 1),
+            'cumulative_ms': round(cumulative_s * 1000, 1),
+        } for (filename, line, func), (_, calls, self_s, cumulative_s, _) in top],
+    }
+
+
+def memory_summary():
+    """tracemalloc peak and top allocation sites still alive at the end of the run"""
+    current, peak = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().statistics('lineno')[:PROFILE_TOP]
+    return {
+        'current_kb': round(current / 1024, 1),
+        'peak_kb': round(peak / 1024, 1),
+        'top_allocations': [{
+            'site': f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+            'size_kb': round(stat.size / 1024, 1),
+            'blocks': stat.count,
+        } for stat in top],
+    }
+
+
+def write_metrics(name, exit_code, started, seconds, profile=None):
+    """Write this run's metrics JSON; returns its path"""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f'{name}.json')
+    metrics = {
+        'script': name,
+        'started': started,
+        'duration_ms': round(seconds * 1000, 1),
+        'exit_code': exit_code,
+        **snapshot(),
+    }
+    if profile:
+        metrics['profile'] = profile
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2)
+    return path
+
+
+def run(main, name):
+    """Run a script's main() with instrumentation and write its metrics file"""
+    mode = profile_mode()
+    if mode == 'memory':
+        tracemalloc.start()
+
+    started = datetime.now().isoformat()
+    start = time.perf_counter()
+    code = 1
+    try:
+        with profiled():
+            code = main()
+    finally:
+        seconds = time.perf_counter() - start
+        profile = None
+        try:
+            if mode == 'cpu':
+                profile = cpu_summary(os.path.join(METRICS_DIR, f'{name}.prof'))
+            elif mode == 'memory':
+                profile = memory_summary()
+                tracemalloc.stop()
+            path = write_metrics(name, code, started, seconds, profile)
+            print(f"\n✓ Metrics written to {path}")
+        except Exception as e:
+            print(f"Warning: Could not write metrics: {e}", file=sys.stderr)
+    return code
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Rate Providers
+Each currency can be served by several sources. They are queried with
+hedged requests: the preferred provider goes first, the next one is fired
+if no valid answer arrived within the hedge delay (or right away if a
+provider failed), and the first valid answer wins. The winner is then
+cross-checked against one more answer, waited for at most
+CROSS_CHECK_WAIT: a hedge already running, or the next provider fired as
+a reference. A reference costs an extra upstream request, so it is only
+sent when the run already hedged or on a REFERENCE_SAMPLE share of runs
+(about one a day at the 3-hourly schedule). Providers whose circuit
+breaker is open are skipped.
+
+Every provider's date is normalized to ISO YYYY-MM-DD, so the published
+rates look the same whichever source won.
+"""
+
+import contextvars
+import math
+import queue
+import random
+import statistics
+import threading
+import re
+import time
+from datetime import date, datetime
+
+from circuit_breaker import get_breakers
+from http_client import get_client
+from instrumentation import count
+
+HEDGE_DELAY = 1.5  # seconds before firing the next provider
+CROSS_CHECK_WAIT = 2.0  # seconds the winner waits for a second answer to compare with
+REFERENCE_SAMPLE = 0.125  # share of unhedged runs that send a reference request
+REQUEST_TIMEOUT = 10
+MAX_DEVIATION_PCT = 5.0  # disagreement between sources that gets flagged
+
+
+# bcvapi.tech dates are Spanish long dates: 'Lunes, 11 Mayo 2026'
+SPANISH_MONTHS = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6, 'julio': 7,
+    'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12,
+}
+
+
+def today():
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def iso_date(text):
+    """'Lunes, 11 Mayo 2026', '11/05/2026' or an ISO timestamp -> '2026-05-11'
+
+    Unrecognized dates fall back to today, like a missing one.
+    """
+    text = (text or '').strip()
+    try:
+        if re.match(r'\d{4}-\d{2}-\d{2}', text):
+            return date.fromisoformat(text[:10]).isoformat()
+        match = re.search(r'(\d{1,2})\s+(?:de\s+)?([a-záéíóú]+)\s+(?:de\s+)?(\d{4})', text.lower())
+        if match and match.group(2) in SPANISH_MONTHS:
+            return date(int(match.group(3)), SPANISH_MONTHS[match.group(2)], int(match.group(1))).isoformat()
+        match = re.fullmatch(r'(\d{1,2})/(\d{1,2})/(\d{4})', text)
+        if match:
+            return date(int(match.group(3)), int(match.group(2)), int(match.group(1))).isoformat()
+    except ValueError:
+        pass
+    if text:
+        count('rates.unparsed_date')
+    return today()
+
+
+def parse_bcvapi(data):
+    """bcvapi.tech: {'tasa': ..., 'fecha': 'Lunes, 11 Mayo 2026'}"""
+    return {
+        'rate': float(data.get('tasa', 0)),
+        'date': iso_date(data.get('fecha'))
+    }
+
+
+def parse_dolarapi(data):
+    """DolarApi: {'promedio': ..., 'fechaActualizacion': ISO timestamp}"""
+    return {
+        'rate': float(data.get('promedio') or 0),
+        'date': iso_date(data.get('fechaActualizacion'))
+    }
+
+
+def query(provider, timeout=REQUEST_TIMEOUT):
+    """Fetch and parse one provider; raises unless the rate is usable"""
+    start = time.perf_counter()
+    response = get_client().get(provider['url'], conditional=True, timeout=timeout)
+    response.raise_for_status()
+    result = provider['parse'](response.json())
+    if not math.isfinite(result['rate']) or result['rate'] <= 0:
+        raise ValueError(f"invalid rate {result['rate']!r}")
+    result['source'] = provider['name']
+    result['latency'] = time.perf_counter() - start
+    return result
+
+
+def cross_check(name, winner, others, max_deviation=MAX_DEVIATION_PCT):
+    """Compare the winning answer with the other answers already received
+
+    With three or more answers an outlier winner is replaced by the answer
+    closest to the median; with two, a disagreement is only reported.
+    """
+    answers = [winner] + others
+    if len(answers) < 2:
+        count('rates.cross_check_unavailable')
+        return winner
+    count('rates.cross_checks')
+
+    median = statistics.median(a['rate'] for a in answers)
+    deviation = abs(winner['rate'] / median - 1) * 100
+    if deviation <= max_deviation:
+        return winner
+
+    count('rates.source_disagreement')
+    if len(answers) >= 3:
+        closest = min(answers, key=lambda a: abs(a['rate'] - median))
+        print(f"  Warning: {name} from {winner['source']} is {deviation:.1f}% off the median "
+              f"of {len(answers)} sources, using {closest['source']}")
+        return closest
+    quotes = ', '.join(f"{a['source']}={a['rate']}" for a in answers)
+    print(f"  Warning: {name} sources disagree by {deviation:.1f}% ({quotes}), keeping {winner['source']}")
+    return winner
+
+
+def hedged_fetch(name, providers, hedge_delay=HEDGE_DELAY, timeout=REQUEST_TIMEOUT,
+                 max_deviation=MAX_DEVIATION_PCT, cross_check_wait=CROSS_CHECK_WAIT,
+                 reference_sample=REFERENCE_SAMPLE):
+    """Fetch a rate from the first provider that gives a valid answer
+
+    Providers without a URL are skipped. Returns {'rate', 'date', 'source',
+    'latency'} or None when every provider failed.
+    """
+    breakers = get_breakers()
+    configured = [p for p in providers if p.get('url')]
+    providers = [p for p in configured if breakers.allow(f"{name}:{p['name']}")]
+    if not providers:
+        if configured:
+            print(f"✗ {name}: every provider's circuit is open")
+        else:
+            print(f"✗ No providers configured for {name}")
+        return None
+
+    # Daemon threads: a loser still waiting on a slow provider must not
+    # hold up the end of the run (executor threads are joined at exit)
+    results = queue.Queue()
+
+    def run(provider):
+        source = f"{name}:{provider['name']}"
+        try:
+            answer = query(provider, timeout)
+        except Exception as e:
+            breakers.record_failure(source)
+            results.put((provider, None, e))
+            return
+        breakers.record_success(source)
+        results.put((provider, answer, None))
+
+    def launch(provider):
+        # In a copy of this context, so the pipeline's stage output and HTTP stats follow
+        threading.Thread(target=contextvars.copy_context().run, args=(run, provider), daemon=True).start()
+
+    answers = []
+    errors = []
+    launched = 0
+    next_launch = time.monotonic()
+    while len(errors) < len(providers):
+        now = time.monotonic()
+        if launched < len(providers) and (now >= next_launch or launched == len(errors)):
+            provider = providers[launched]
+            if launched:
+                print(f"  {name}: hedging with {provider['name']}")
+                count('rates.hedged_requests')
+            launch(provider)
+            launched += 1
+            next_launch = now + hedge_delay
+            continue
+
+        wait_for = max(0.0, next_launch - now) if launched < len(providers) else None
+        try:
+            provider, answer, error = results.get(timeout=wait_for)
+        except queue.Empty:
+            continue
+        if error is None:
+            answers.append(answer)
+            break
+        errors.append(f"{provider['name']}: {error}")
+        # Do not wait out the hedge delay behind a failed provider
+        next_launch = time.monotonic()
+
+    # Get a second answer to check the winner against: wait briefly for a
+    # hedge still running, or fire the next provider as a reference when
+    # this run already hedged (the primary was slow or failed) or is sampled
+    if answers:
+        in_flight = launched - len(errors) - 1
+        hedged = launched > 1
+        if not in_flight and launched < len(providers) and (hedged or random.random() < reference_sample):
+            count('rates.reference_requests')
+            launch(providers[launched])
+            launched += 1
+            in_flight = 1
+        deadline = time.monotonic() + cross_check_wait
+        while in_flight and len(answers) < 2:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                _, answer, error = results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            in_flight -= 1
+            if error is None:
+                answers.append(answer)
+
+    if not answers:
+        print(f"✗ Error fetching {name} rate: {'; '.join(errors)}")
+        return None
+
+    winner = cross_check(name, answers[0], answers[1:], max_deviation)
+    count(f"rates.source.{winner['source']}")
+    return winner
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Exchange Rate Rollups
+Maintains daily and weekly OHLC candles (open/high/low/close + % change)
+for each currency as small artifacts the calculator can load instead of
+the raw sample log. Each new sample only touches the newest candle.
+"""
+
+import json
+import os
+from datetime import datetime
+
+from artifacts import publish_json
+
+CURRENCIES = ('eur', 'usd', 'usdt')
+
+# Artifact files and how many periods each keeps (newest first)
+ROLLUPS = {
+    'day': {'file': 'data/bcv-rates-daily.json', 'max_periods': 14},
+    'week': {'file': 'data/bcv-rates-weekly.json', 'max_periods': 26},
+}
+
+
+def period_key(timestamp, period):
+    """Bucket key for an ISO timestamp: '2026-05-11' or ISO week '2026-W20'"""
+    moment = datetime.fromisoformat(timestamp)
+    if period == 'week':
+        year, week, _ = moment.isocalendar()
+        return f"{year}-W{week:02d}"
+    return moment.strftime('%Y-%m-%d')
+
+
+def change_pct(close, previous_close):
+    """Percentage change between two closes"""
+    if previous_close and previous_close > 0:
+        # 'or 0.0' folds -0.0 into 0.0
+        return round(((close - previous_close) / previous_close) * 100, 2) or 0.0
+    return 0.0
+
+
+def add_sample(candles, key, rate, max_periods):
+    """Fold one rate into a newest-first candle list, in place"""
+    rate = round(rate, 4)
+    if candles and candles[0]['period'] == key:
+        candle = candles[0]
+        candle['high'] = max(candle['high'], rate)
+        candle['low'] = min(candle['low'], rate)
+        candle['close'] = rate
+    elif candles and candles[0]['period'] > key:
+        # Older than the newest candle: already folded in, ignore
+        return
+    else:
+        candle = {'period': key, 'open': rate, 'high': rate, 'low': rate, 'close': rate}
+        candles.insert(0, candle)
+        del candles[max_periods:]
+
+    previous_close = candles[1]['close'] if len(candles) > 1 else candle['open']
+    candle['change_pct'] = change_pct(candle['close'], previous_close)
+
+
+def add_entry(rollup, entry, period, max_periods):
+    """Fold one history entry into a rollup document"""
+    key = period_key(entry['timestamp'], period)
+    for currency in CURRENCIES:
+        rate = entry.get(currency, {}).get('rate')
+        if rate:
+            candles = rollup['currencies'].setdefault(currency, [])
+            add_sample(candles, key, rate, max_periods)
+
+
+def load_rollup(path):
+    """Load a rollup artifact, or None if it does not exist yet"""
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not load rollup {path}: {e}")
+    return None
+
+
+def update_rollups(entry, backfill=None):
+    """Fold a new history entry into every rollup artifact
+
+    backfill is a callable returning all stored entries in chronological
+    order; it is only used when an artifact does not exist yet.
+    """
+    for period, config in ROLLUPS.items():
+        rollup = load_rollup(config['file'])
+        if rollup is None:
+            rollup = {'period': period, 'currencies': {}}
+            if backfill:
+                for past in backfill():
+                    add_entry(rollup, past, period, config['max_periods'])
+                    if past.get('last_seen'):
+                        # End of a run of unchanged samples
+                        add_entry(rollup, {**past, 'timestamp': past['last_seen']}, period, config['max_periods'])
+        add_entry(rollup, entry, period, config['max_periods'])
+
+        output = {
+            'last_updated': datetime.now().isoformat(),
+            'period': period,
+            'currencies': rollup['currencies']
+        }
+
+        publish_json(config['file'], output)
+
+    print(f"✓ Rollups updated ({', '.join(c['file'] for c in ROLLUPS.values())})")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Binary Rate Series
+Fixed-width, time-sorted records of (timestamp, EUR, USD, USDT) in a
+memory-mapped file, so "the rate at time T" is a binary search over the
+timestamp column instead of a scan of the JSON history.
+
+Layout: a 16-byte header (magic, version, record size) followed by
+32-byte little-endian records: int64 Unix seconds, then three float64
+rates (NaN when missing). Each record holds until the next one, which
+matches the run-length encoded history.
+
+Usage:
+  python scripts/rate_series.py asof 2026-05-10T12:00
+  python scripts/rate_series.py export --from 2026-05-01 --to 2026-05-08 [--format csv|json]
+  python scripts/rate_series.py rebuild
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+SERIES_FILE = 'data/history/rates.bin'
+MAGIC = b'RTS1'
+VERSION = 1
+HEADER = struct.Struct('<4sHH8x')
+RECORD = np.dtype([('ts', '<i8'), ('eur', '<f8'), ('usd', '<f8'), ('usdt', '<f8')])
+CURRENCIES = ('eur', 'usd', 'usdt')
+
+
+def to_epoch(timestamp):
+    """ISO timestamp (naive means UTC, as written by CI) to Unix seconds"""
+    moment = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def from_epoch(seconds):
+    return datetime.fromtimestamp(int(seconds), timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def entry_record(entry):
+    """History entry -> (ts, eur, usd, usdt) tuple"""
+    rates = [entry.get(c, {}).get('rate') for c in CURRENCIES]
+    return (to_epoch(entry['timestamp']), *[np.nan if r is None else r for r in rates])
+
+
+def _write_header(f):
+    f.write(HEADER.pack(MAGIC, VERSION, RECORD.itemsize))
+
+
+class RateSeries:
+    """Read-only, memory-mapped view of a series file"""
+
+    def __init__(self, path=SERIES_FILE):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or record_size != RECORD.itemsize:
+            raise ValueError(f"{path} is not a rate series (version {version})")
+        count = (os.path.getsize(path) - HEADER.size) // RECORD.itemsize
+        self.records = (np.memmap(path, dtype=RECORD, mode='r', offset=HEADER.size, shape=(count,))
+                        if count else np.empty(0, dtype=RECORD))
+
+    def __len__(self):
+        return len(self.records)
+
+    def _index(self, moment):
+        """Number of records at or before `moment` (ISO string or Unix seconds)"""
+        seconds = to_epoch(moment) if isinstance(moment, str) else int(moment)
+        return int(np.searchsorted(self.records['ts'], seconds, side='right'))
+
+    def as_of(self, moment):
+        """Rates in effect at `moment`: the newest record not after it, or None"""
+        i = self._index(moment)
+        return record_dict(self.records[i - 1]) if i else None
+
+    def range(self, start=None, end=None):
+        """Records with start <= timestamp <= end (either bound optional)"""
+        lo = 0 if start is None else int(np.searchsorted(
+            self.records['ts'], to_epoch(start) if isinstance(start, str) else int(start), side='left'))
+        hi = len(self.records) if end is None else self._index(end)
+        return self.records[lo:hi]
+
+    def last_timestamp(self):
+        return int(self.records['ts'][-1]) if len(self.records) else None
+
+
+def record_dict(record):
+    """One record as {'timestamp', 'eur', 'usd', 'usdt'} with None for NaN"""
+    out = {'timestamp': from_epoch(record['ts'])}
+    for currency in CURRENCIES:
+        value = float(record[currency])
+        out[currency] = None if np.isnan(value) else value
+    return out
+
+
+def append_entry(entry, path=SERIES_FILE):
+    """Append a history entry; entries not newer than the last record are ignored
+
+    Returns True if a record was written.
+    """
+    record = np.array([entry_record(entry)], dtype=RECORD)
+    if os.path.exists(path):
+        last = RateSeries(path).last_timestamp()
+        if last is not None and record['ts'][0] <= last:
+            return False
+        with open(path, 'ab') as f:
+            f.write(record.tobytes())
+        return True
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        _write_header(f)
+        f.write(record.tobytes())
+    return True
+
+
+def rebuild(entries, path=SERIES_FILE):
+    """Write a series file from history entries (any order); returns the record count"""
+    records = np.array([entry_record(e) for e in entries], dtype=RECORD)
+    records = records[np.argsort(records['ts'], kind='stable')]
+    # Keep the last record for any repeated timestamp
+    if len(records):
+        keep = np.append(records['ts'][1:] != records['ts'][:-1], True)
+        records = records[keep]
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        _write_header(f)
+        f.write(records.tobytes())
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+def main(argv=None):
+    """Query or rebuild the binary rate series"""
+    parser = argparse.ArgumentParser(description='Query the binary rate series')
+    parser.add_argument('--file', default=SERIES_FILE, help=f'series file (default: {SERIES_FILE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    asof = commands.add_parser('asof', help='rates in effect at a time')
+    asof.add_argument('moment', help='ISO timestamp, e.g. 2026-05-10T12:00')
+
+    export = commands.add_parser('export', help='export a window of records')
+    export.add_argument('--from', dest='start', help='ISO start (inclusive)')
+    export.add_argument('--to', dest='end', help='ISO end (inclusive)')
+    export.add_argument('--format', choices=('csv', 'json'), default='csv')
+
+    commands.add_parser('rebuild', help='rebuild the file from the JSONL history store')
+    args = parser.parse_args(argv)
+
+    if args.command == 'rebuild':
+        from fetch_bcv_rates import open_history_store
+        count = rebuild(open_history_store().iter_entries(), args.file)
+        print(f"✓ Wrote {count} records to {args.file}")
+        return 0
+
+    if not os.path.exists(args.file):
+        print(f"✗ {args.file} not found. Run: python scripts/rate_series.py rebuild", file=sys.stderr)
+        return 1
+    series = RateSeries(args.file)
+
+    if args.command == 'asof':
+        result = series.as_of(args.moment)
+        if result is None:
+            print(f"✗ No rates at or before {args.moment}", file=sys.stderr)
+            return 1
+        print(json.dumps(result))
+        return 0
+
+    rows = [record_dict(r) for r in series.range(args.start, args.end)]
+    if args.format == 'json':
+        print(json.dumps(rows, indent=2))
+    else:
+        print('timestamp,' + ','.join(CURRENCIES))
+        for row in rows:
+            print(row['timestamp'] + ',' + ','.join('' if row[c] is None else repr(row[c]) for c in CURRENCIES))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Data Pipeline Runner
+Runs the rates, liquidity and Hevy fetchers (plus the stages derived
+from them) as stages of a small DAG in one process. Independent stages run concurrently and share one HTTP
+connection pool; the run ends with a per-stage timing summary and the
+consolidated set of files that changed.
+"""
+
+import argparse
+import contextvars
+import hashlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import derive_liquidity_usd
+import fetch_bcv_liquidity
+import fetch_bcv_rates
+import scrape_hevy
+from http_client import get_client, scoped_stats
+from rate_rollups import ROLLUPS
+from shards import shard_outputs
+from instrumentation import profiled, span
+import instrumentation
+
+# name -> entry point, upstream stages, and the files/directories it writes
+STAGES = {
+    'rates': {
+        'run': fetch_bcv_rates.main,
+        'after': [],
+        'outputs': [
+            fetch_bcv_rates.OUTPUT_FILE,
+            fetch_bcv_rates.HISTORY_FILE,
+            fetch_bcv_rates.HISTORY_DIR,
+            fetch_bcv_rates.rate_series.SERIES_FILE,
+            *shard_outputs('rates'),
+            *(rollup['file'] for rollup in ROLLUPS.values()),
+        ],
+    },
+    'liquidity': {
+        'run': fetch_bcv_liquidity.main,
+        'after': [],
+        'outputs': [
+            fetch_bcv_liquidity.OUTPUT_FILE,
+            fetch_bcv_liquidity.SERIES_FILE,
+            *shard_outputs('liquidity'),
+        ],
+    },
+    'derived': {
+        'run': derive_liquidity_usd.main,
+        'after': ['rates', 'liquidity'],
+        'outputs': [derive_liquidity_usd.OUTPUT_FILE],
+    },
+    'hevy': {
+        'run': scrape_hevy.main,
+        'after': [],
+        'outputs': [
+            scrape_hevy.OUTPUT_FILE,
+            scrape_hevy.NUMERIC_FILE,
+            scrape_hevy.training_load.OUTPUT_FILE,
+            scrape_hevy.LEGACY_ARCHIVE_FILE,  # Only ever removed, so CI commits the removal
+        ],
+    },
+}
+
+
+# Output buffer of the stage running in this context; worker threads a
+# stage starts in a copy of its context write there too
+_stage_buffer = contextvars.ContextVar('stage_buffer', default=None)
+
+
+class StageOutput:
+    """sys.stdout/stderr proxy that sends each stage's output to its own buffer"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        return (_stage_buffer.get() or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def output_files(paths):
+    """Expand output paths (files or directories) into existing files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names)
+        elif os.path.exists(path):
+            files.append(path)
+    return files
+
+
+def snapshot(paths):
+    """Map each output file to the SHA-256 of its content"""
+    hashes = {}
+    for path in output_files(paths):
+        with open(path, 'rb') as f:
+            hashes[path] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def run_stage(name):
+    """Run one stage with its output and HTTP stats kept apart; returns (exit code, seconds, log)"""
+    buffer = io.StringIO()
+    token = _stage_buffer.set(buffer)
+    start = time.perf_counter()
+    try:
+        with scoped_stats(), profiled(), span(f'stage.{name}'):
+            code = STAGES[name]['run']([])
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+    except Exception as e:
+        print(f"✗ Stage {name} crashed: {e}")
+        code = 1
+    finally:
+        _stage_buffer.reset(token)
+    return code, time.perf_counter() - start, buffer.getvalue()
+
+
+def run_pipeline(selected, max_workers=len(STAGES)):
+    """Run the selected stages, each as soon as its upstream stages succeeded
+
+    Returns {name: (exit code, seconds)}; stages whose upstream failed are
+    skipped with exit code None.
+    """
+    stdout, stderr = StageOutput(sys.stdout), StageOutput(sys.stderr)
+    real_stdout, real_stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = stdout, stderr
+
+    results = {}
+    pending = {name: [dep for dep in STAGES[name]['after'] if dep in selected] for name in selected}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            while pending or running:
+                for name, deps in list(pending.items()):
+                    if not all(dep in results for dep in deps):
+                        continue
+                    if any(results[dep][0] != 0 for dep in deps):
+                        results[name] = (None, 0.0)
+                    else:
+                        running[executor.submit(run_stage, name)] = name
+                    del pending[name]
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    code, seconds, log = future.result()
+                    results[name] = (code, seconds)
+                    real_stdout.write(f"\n── {name} " + "─" * 40 + "\n" + log)
+                    real_stdout.flush()
+    finally:
+        sys.stdout, sys.stderr = real_stdout, real_stderr
+
+    return results
+
+
+def main(argv=None):
+    """Main execution"""
+    parser = argparse.ArgumentParser(description='Run the data fetchers as one pipeline')
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"comma-separated stages to run (default: {','.join(STAGES)})")
+    parser.add_argument('--write-set', metavar='FILE',
+                        help='write the list of changed files to FILE (one per line)')
+    args = parser.parse_args(argv)
+
+    selected = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = [s for s in selected if s not in STAGES]
+    if unknown:
+        print(f"✗ Unknown stages: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    print("=" * 50)
+    print(f"Data Pipeline ({', '.join(selected)})")
+    print("=" * 50)
+
+    outputs = [path for name in selected for path in STAGES[name]['outputs']]
+    before = snapshot(outputs)
+
+    start = time.perf_counter()
+    results = run_pipeline(selected)
+    total = time.perf_counter() - start
+
+    after = snapshot(outputs)
+    changed = sorted(p for p in set(before) | set(after) if before.get(p) != after.get(p))
+
+    print("\n" + "=" * 50)
+    print("Stage summary")
+    for name in selected:
+        code, seconds = results[name]
+        status = "skipped" if code is None else "✓" if code == 0 else f"✗ (exit {code})"
+        print(f"  {name:<10} {seconds * 1000:>8.0f} ms  {status}")
+    print(f"  {'total':<10} {total * 1000:>8.0f} ms")
+    get_client().report()
+
+    print(f"\nWrite set ({len(changed)} files):")
+    for path in changed:
+        print(f"  {path}")
+    if args.write_set:
+        with open(args.write_set, 'w', encoding='utf-8') as f:
+            f.write(''.join(f"{path}\n" for path in changed))
+
+    return 0 if all(code == 0 for code, _ in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(instrumentation.run(main, 'pipeline'))
@@ -6,15 +6,31 @@ Fetches latest workout data from Hevy API (requires Pro subscription)
 
 import json
 import os
+import re
 import sys
-from datetime import datetime
-
-import requests
-
-# Configuration
-HEVY_API_BASE = "https://api.hevyapp.com/v1"
+from datetime import datetime, timedelta, timezone
+
+from artifacts import load_json, publish_json, write_json
+from hevy_client import HevyClient
+from http_client import get_client
+from instrumentation import count, timed
+import instrumentation
+import training_load
+from workout_model import Workout
+
+# Configuration (API base overridable from the environment, e.g. by scripts/benchmark.py)
+HEVY_API_BASE = os.environ.get("HEVY_API_BASE", "https://api.hevyapp.com/v1")
 HEVY_PROFILE_URL = "https://hevy.com/user/cjj109"
 OUTPUT_FILE = "data/gym-data.json"
+NUMERIC_FILE = "data/gym-data-numeric.json"  # Same workouts with numeric sets and aggregates
+ARCHIVE_FILE = ".cache/hevy/archive.json"  # Every workout plus the sync cursor (actions/cache, not served)
+LEGACY_ARCHIVE_FILE = "data/hevy-archive.json"  # Old location in the served tree, read once and removed
+WORKOUTS_PAGE_SIZE = 10  # Maximum page size for the workouts endpoints
+WORKOUT_ID_PATTERN = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.IGNORECASE)
+RECENT_WORKOUTS = 7  # Published: 1 current + 6 previous
+TEMPLATE_CACHE_FILE = ".cache/hevy/exercise-templates.json"  # Restored between runs by actions/cache
+TEMPLATE_CACHE_TTL = timedelta(days=7)
+TEMPLATES_PAGE_SIZE = 100
 
 
 def get_api_key():
@@ -27,156 +43,334 @@ def get_api_key():
     return api_key
 
 
-def fetch_workouts(api_key, page=1, page_size=7):
-    """Fetch workouts from Hevy API"""
-    try:
-        response = requests.get(
-            f"{HEVY_API_BASE}/workouts",
-            headers={"api-key": api_key, "accept": "application/json"},
-            params={"page": page, "pageSize": page_size},
-            timeout=15
-        )
-        response.raise_for_status()
-        data = response.json()
-        return data.get("workouts", [])
-    except Exception as e:
-        print(f"ERROR: Failed to fetch workouts: {e}", file=sys.stderr)
+@timed('hevy.fetch_workouts')
+def fetch_workouts(client):
+    """Fetch every workout page from Hevy API
+
+    Returns the list of workouts, or None if any page failed.
+    """
+    workouts, complete = client.get_pages("/workouts", "workouts", WORKOUTS_PAGE_SIZE)
+    if not complete:
+        print("ERROR: Failed to fetch workouts", file=sys.stderr)
         return None
+    return workouts
+
 
+@timed('hevy.fetch_workout_events')
+def fetch_workout_events(client, since):
+    """Fetch every workout updated or deleted since an ISO timestamp
 
-def fetch_exercise_templates(api_key):
-    """Fetch exercise templates to get muscle group info"""
-    templates = {}
-    page = 1
-    while True:
+    Returns the list of events, or None on error. Hevy answers 404 when
+    there are no events for the window, which reads as an empty list.
+    """
+    events, complete = client.get_pages("/workouts/events", "events", WORKOUTS_PAGE_SIZE,
+                                        params={"since": since})
+    if not complete:
+        print("ERROR: Failed to fetch workout events", file=sys.stderr)
+        return None
+    return events
+
+
+def load_archive():
+    """Load the local workout archive
+
+    Falls back to the old copy under data/ once; without either the next
+    sync downloads every workout again.
+    """
+    for path in (ARCHIVE_FILE, LEGACY_ARCHIVE_FILE):
         try:
-            response = requests.get(
-                f"{HEVY_API_BASE}/exercise_templates",
-                headers={"api-key": api_key, "accept": "application/json"},
-                params={"page": page, "pageSize": 100},
-                timeout=15
-            )
-            response.raise_for_status()
-            data = response.json()
-            page_templates = data.get("exercise_templates", [])
-
-            if not page_templates:
-                break
-
-            for t in page_templates:
-                templates[t["id"]] = {
-                    "primary_muscle_group": t.get("primary_muscle_group", ""),
-                    "secondary_muscle_groups": t.get("secondary_muscle_groups", [])
-                }
-
-            page += 1
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
         except Exception as e:
-            print(f"WARNING: Could not fetch exercise templates page {page}: {e}")
-            break
+            print(f"WARNING: Could not load workout archive: {e}")
+    return {"cursor": None, "workouts": {}}
 
-    return templates
 
+@timed('hevy.save_archive')
+def save_archive(archive):
+    """Save the local workout archive (cursor included) and drop the old published copy"""
+    try:
+        write_json(ARCHIVE_FILE, archive, indent=None, separators=(',', ':'), volatile=())
+        if os.path.exists(LEGACY_ARCHIVE_FILE):
+            os.remove(LEGACY_ARCHIVE_FILE)
+            print(f"  Moved the workout archive to {ARCHIVE_FILE}, removed {LEGACY_ARCHIVE_FILE}")
+        return True
+    except IOError as e:
+        print(f"ERROR: Failed to save workout archive: {e}", file=sys.stderr)
+        return False
 
-def fetch_workout_count(api_key):
-    """Fetch total workout count"""
+
+@timed('hevy.sync_archive')
+def sync_archive(client, archive, full=False):
+    """Bring the archive up to date
+
+    Without a cursor (or with full=True) every workout page is downloaded.
+    Otherwise only the workout events since the cursor are applied, so the
+    cost of a run depends on new activity rather than on history size.
+    Returns (changed, deleted) counts, or None on error.
+    """
+    # Take the cursor before fetching so nothing that changes mid-sync is missed
+    sync_started = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+    if full or not archive.get("cursor"):
+        workouts = fetch_workouts(client)
+        if workouts is None:
+            return None
+        archive["workouts"] = {w["id"]: w for w in workouts}
+        archive["cursor"] = sync_started
+        count('hevy.workouts_synced', len(workouts))
+        return len(workouts), 0
+
+    events = fetch_workout_events(client, archive["cursor"])
+    if events is None:
+        return None
+
+    changed = deleted = 0
+    for event in events:
+        if event.get("type") == "updated" and event.get("workout"):
+            workout = event["workout"]
+            archive["workouts"][workout["id"]] = workout
+            changed += 1
+        elif event.get("type") == "deleted" and event.get("id"):
+            if archive["workouts"].pop(event["id"], None) is not None:
+                deleted += 1
+
+    archive["cursor"] = sync_started
+    count('hevy.workouts_synced', changed)
+    count('hevy.workouts_deleted', deleted)
+    return changed, deleted
+
+
+def latest_workouts(archive, count=RECENT_WORKOUTS):
+    """Most recent workouts in the archive, newest first"""
+    workouts = sorted(archive["workouts"].values(), key=lambda w: w.get("start_time", ""), reverse=True)
+    return workouts[:count]
+
+
+def template_info(t):
+    """Keep only the muscle group fields of an exercise template"""
+    return {
+        "primary_muscle_group": t.get("primary_muscle_group", ""),
+        "secondary_muscle_groups": t.get("secondary_muscle_groups", [])
+    }
+
+
+def fetch_exercise_templates(client):
+    """Fetch every exercise template to get muscle group info
+
+    Returns (templates, complete).
+    """
+    page_templates, complete = client.get_pages("/exercise_templates", "exercise_templates",
+                                                TEMPLATES_PAGE_SIZE, conditional=True)
+    templates = {t["id"]: template_info(t) for t in page_templates}
+    return templates, complete
+
+
+def fetch_exercise_template(client, template_id):
+    """Fetch a single exercise template by id"""
     try:
-        response = requests.get(
-            f"{HEVY_API_BASE}/workouts/count",
-            headers={"api-key": api_key, "accept": "application/json"},
-            timeout=10
-        )
-        response.raise_for_status()
-        data = response.json()
-        return data.get("workout_count", 0)
+        data = client.get_json(f"/exercise_templates/{template_id}")
+        if data is None:
+            print(f"WARNING: Exercise template {template_id} not found")
+            return None
+        return template_info(data)
     except Exception as e:
-        print(f"WARNING: Could not fetch workout count: {e}")
-        return 0
+        print(f"WARNING: Could not fetch exercise template {template_id}: {e}")
+        return None
+
+
+def load_template_cache():
+    """Load cached exercise templates"""
+    try:
+        if os.path.exists(TEMPLATE_CACHE_FILE):
+            with open(TEMPLATE_CACHE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"WARNING: Could not load template cache: {e}")
+    return {"refreshed_at": None, "templates": {}}
 
 
-def parse_workout(workout, templates):
-    """Parse a workout from API response into our format"""
-    # Calculate duration from start_time and end_time
-    duration_min = 0
+def save_template_cache(cache):
+    """Save exercise templates for the next run"""
     try:
-        start = datetime.fromisoformat(workout["start_time"].replace("Z", "+00:00"))
-        end = datetime.fromisoformat(workout["end_time"].replace("Z", "+00:00"))
-        duration_min = int((end - start).total_seconds() / 60)
-    except (KeyError, ValueError):
-        pass
-
-    # Calculate total volume (sum of weight_kg * reps for all sets)
-    total_volume = 0
-    exercises = []
-
-    for ex in workout.get("exercises", []):
-        sets = []
-        for s in ex.get("sets", []):
-            weight_kg = s.get("weight_kg")
-            reps = s.get("reps")
-
-            if weight_kg is not None and reps is not None:
-                total_volume += weight_kg * reps
-                sets.append({
-                    "reps": reps,
-                    "weight": f"{weight_kg} kg"
-                })
-            elif reps is not None:
-                sets.append({
-                    "reps": reps,
-                    "weight": "0 kg"
-                })
-
-        if sets:
-            exercise_data = {
-                "name": ex.get("title", "Unknown"),
-                "sets": sets
-            }
-
-            # Add muscle group from templates
-            template_id = ex.get("exercise_template_id", "")
-            if template_id and template_id in templates:
-                t = templates[template_id]
-                exercise_data["muscle_group"] = t["primary_muscle_group"]
-                if t["secondary_muscle_groups"]:
-                    exercise_data["secondary_muscles"] = t["secondary_muscle_groups"]
-
-            exercises.append(exercise_data)
-
-    # Format volume with thousands separator
-    volume_str = f"{total_volume:,.0f} kg"
-
-    # Parse date
-    workout_date = datetime.now().strftime("%Y-%m-%d")
+        os.makedirs(os.path.dirname(TEMPLATE_CACHE_FILE), exist_ok=True)
+        with open(TEMPLATE_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, separators=(',', ':'))
+    except IOError as e:
+        print(f"WARNING: Could not save template cache: {e}")
+
+
+@timed('hevy.resolve_templates')
+def resolve_templates(client, workouts, refresh=True):
+    """Return templates for the exercises in these workouts
+
+    Templates come from the on-disk cache. An expired or missing cache is
+    refreshed in full (unless refresh=False); otherwise only template ids
+    missing from the cache (e.g. newly created custom exercises) are looked
+    up one by one.
+    """
+    cache = load_template_cache()
+    refreshed_at = cache.get("refreshed_at")
+    expired = (not refreshed_at or
+               datetime.now(timezone.utc) - datetime.fromisoformat(refreshed_at) > TEMPLATE_CACHE_TTL)
+
+    if expired and refresh:
+        print("  Template cache expired, refreshing all pages")
+        templates, complete = fetch_exercise_templates(client)
+        cache["templates"].update(templates)
+        if complete:
+            cache["refreshed_at"] = datetime.now(timezone.utc).isoformat()
+        save_template_cache(cache)
+
+    needed = {ex.get("exercise_template_id") for w in workouts for ex in w.get("exercises", [])}
+    missing = sorted(t for t in needed if t and t not in cache["templates"])
+    if missing:
+        print(f"  Looking up {len(missing)} templates missing from cache")
+        for template_id in missing:
+            template = fetch_exercise_template(client, template_id)
+            if template:
+                cache["templates"][template_id] = template
+        save_template_cache(cache)
+
+    return cache["templates"]
+
+
+def valid_workout_id(workout_id):
+    """True if workout_id looks like a Hevy workout id (a UUID)"""
+    return bool(WORKOUT_ID_PATTERN.fullmatch(workout_id or ''))
+
+
+def fetch_workout(client, workout_id):
+    """Fetch a single workout by id; None if it does not exist"""
+    if not valid_workout_id(workout_id):
+        raise ValueError(f"invalid workout id {workout_id!r}")
     try:
-        start = datetime.fromisoformat(workout["start_time"].replace("Z", "+00:00"))
-        workout_date = start.strftime("%Y-%m-%d")
-    except (KeyError, ValueError):
-        pass
+        data = client.get_json(f"/workouts/{workout_id}")
+    except Exception as e:
+        print(f"ERROR: Could not fetch workout {workout_id}: {e}", file=sys.stderr)
+        return None
+    # The endpoint may wrap the workout in {"workout": {...}}
+    return (data or {}).get("workout", data)
 
-    return {
-        "name": workout.get("title", "Workout"),
-        "date": workout_date,
-        "duration": f"{duration_min} min",
-        "volume": volume_str,
-        "exercises": exercises
-    }
+
+def fetch_workout_count(client):
+    """Fetch total workout count"""
+    try:
+        data = client.get_json("/workouts/count")
+        return (data or {}).get("workout_count", 0)
+    except Exception as e:
+        print(f"WARNING: Could not fetch workout count: {e}")
+        return 0
 
 
-def save_data(data):
-    """Save data to JSON file"""
+@timed('hevy.save_data')
+def save_data(data, path=OUTPUT_FILE):
+    """Publish data as a minified JSON artifact"""
     try:
-        os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"✓ Data saved to {OUTPUT_FILE}")
+        if publish_json(path, data):
+            print(f"✓ Data saved to {path}")
+        else:
+            print(f"✓ Data unchanged, {path} left as is")
         return True
     except IOError as e:
         print(f"ERROR: Failed to save data: {e}", file=sys.stderr)
         return False
 
 
-def main():
+@timed('hevy.ingest_workout')
+def ingest_workout(client, workout_id):
+    """Webhook mode: fetch one workout and patch the published files in place
+
+    Only that workout is fetched, only its missing templates are looked up
+    (no full template refresh) and the rendered entries of the other recent
+    workouts are reused from the published files by id. The sync cursor is
+    left alone, so the next scheduled run still replays the events.
+    Returns an exit code, or None when a full run is needed instead.
+    """
+    # The id comes from the webhook payload: never put anything else in a request path
+    if not valid_workout_id(workout_id):
+        print(f"  Ignoring invalid workout id {workout_id[:64]!r}, running a full fetch")
+        count('hevy.invalid_workout_id')
+        return None
+
+    published = load_json(OUTPUT_FILE)
+    numeric = load_json(NUMERIC_FILE)
+    load_state = training_load.load_state()
+    if not published or not numeric or not load_state["workouts"]:
+        print("  Nothing to patch (no published workouts or training load), running a full fetch")
+        return None
+
+    print(f"\n→ Fetching workout {workout_id}...")
+    workout = fetch_workout(client, workout_id)
+    if not workout or not workout.get("id"):
+        print(f"  Workout {workout_id} not available, running a full fetch")
+        return None
+
+    archive = load_archive()
+    is_new = workout["id"] not in archive["workouts"]
+    archive["workouts"][workout["id"]] = workout
+    count('hevy.workouts_synced')
+
+    # Rendered entries by id: numeric workouts are in the same order as the display ones
+    displayed = [published["last_workout"], *published.get("previous_workouts", [])]
+    rendered = {n["id"]: (d, n) for d, n in zip(displayed, numeric["workouts"]) if n.get("id")}
+    rendered.pop(workout["id"], None)
+
+    recent = latest_workouts(archive)
+    to_parse = [w for w in recent if w["id"] not in rendered]
+
+    # Workouts not yet in the training load (normally just this one)
+    load_added, load_removed = training_load.pending_changes(load_state, archive)
+
+    templates = resolve_templates(client, to_parse + load_added, refresh=False)
+    for w in to_parse:
+        model = Workout.from_api(w, templates)
+        rendered[w["id"]] = (model.to_display(), model.to_numeric())
+    print(f"✓ Parsed {len(to_parse)} workouts, reused {len(recent) - len(to_parse)}")
+
+    parsed = [rendered[w["id"]] for w in recent]
+    total = published.get("stats", {}).get("total_workouts", "0")
+    if is_new and total.isdigit():
+        total = str(int(total) + 1)
+
+    new_data = {
+        **published,
+        "last_updated": datetime.now().isoformat(),
+        "last_workout": parsed[0][0],
+        "stats": {**published.get("stats", {}), "total_workouts": total},
+        "previous_workouts": [d for d, _ in parsed[1:]],
+    }
+    new_data.pop("schema_version", None)
+    numeric_data = {"last_updated": new_data["last_updated"], "workouts": [n for _, n in parsed]}
+
+    training_load.apply_changes(load_state, load_added, load_removed, templates)
+    load_data = {"last_updated": new_data["last_updated"], **training_load.artifact(load_state)}
+
+    print(f"✓ Latest workout: {new_data['last_workout']['name']} ({new_data['last_workout']['date']})")
+    print("\n→ API usage:")
+    client.report()
+
+    if (save_data(new_data) and save_data(numeric_data, NUMERIC_FILE)
+            and save_data(load_data, training_load.OUTPUT_FILE) and save_archive(archive)):
+        training_load.save_state(load_state)
+        print("✓ Workout ingested successfully")
+        return 0
+    print("✗ Failed to save data")
+    return 1
+
+
+def main(argv=None):
     """Main execution"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Fetch Hevy workout data')
+    parser.add_argument('--full', action='store_true',
+                        help='re-download every workout instead of syncing changes since the cursor')
+    parser.add_argument('--workout', metavar='ID', default=os.environ.get('HEVY_WORKOUT_ID') or None,
+                        help='only ingest this workout (webhook mode; default: $HEVY_WORKOUT_ID)')
+    args = parser.parse_args(argv)
+
     print("=" * 50)
     print("Hevy Workout Fetcher (API)")
     print("=" * 50)
@@ -185,22 +379,51 @@ def main():
     api_key = get_api_key()
     if not api_key:
         return 1
+    client = HevyClient(api_key, HEVY_API_BASE)
+
+    if args.workout and not args.full:
+        result = ingest_workout(client, args.workout)
+        if result is not None:
+            return result
+
+    # Sync the local archive (only new, changed or deleted workouts)
+    archive = load_archive()
+    mode = "full" if args.full or not archive.get("cursor") else "incremental"
+    print(f"\n→ Syncing workout archive ({mode})...")
+    result = sync_archive(client, archive, full=args.full)
+    if result is None:
+        print("✗ Workout sync failed")
+        return 1
+    changed, deleted = result
+    print(f"✓ {changed} workouts fetched, {deleted} deleted ({len(archive['workouts'])} in archive)")
 
-    # Fetch exercise templates for muscle group data
-    print("\n→ Fetching exercise templates...")
-    templates = fetch_exercise_templates(api_key)
-    print(f"✓ Loaded {len(templates)} exercise templates")
-
-    # Fetch workouts from API (latest 7)
-    print("\n→ Fetching workouts from Hevy API...")
-    workouts = fetch_workouts(api_key, page=1, page_size=7)
+    # Cheap consistency check: resync everything if the archive drifted
+    print("\n→ Fetching workout count...")
+    total_count = fetch_workout_count(client) or len(archive["workouts"])
+    print(f"✓ Total workouts: {total_count}")
+    if mode == "incremental" and total_count and total_count != len(archive["workouts"]):
+        print(f"WARNING: Archive has {len(archive['workouts'])} workouts, Hevy reports {total_count}; resyncing")
+        if sync_archive(client, archive, full=True) is None:
+            print("✗ Workout sync failed")
+            return 1
 
+    workouts = latest_workouts(archive)
     if not workouts:
         print("✗ No workouts found or API error")
         return 1
 
-    # Parse all workouts
-    parsed = [parse_workout(w, templates) for w in workouts]
+    # Workouts not yet folded into the weekly muscle-group totals
+    load_state = training_load.load_state()
+    load_added, load_removed = training_load.pending_changes(load_state, archive)
+
+    # Resolve exercise templates (muscle group data) through the cache
+    print("\n→ Resolving exercise templates...")
+    templates = resolve_templates(client, workouts + load_added)
+    print(f"✓ {len(templates)} exercise templates available")
+
+    # Parse all workouts once into the numeric model, then render both forms
+    models = [Workout.from_api(w, templates) for w in workouts]
+    parsed = [m.to_display() for m in models]
 
     latest = parsed[0]
     print(f"✓ Latest workout: {latest['name']} ({latest['date']})")
@@ -211,12 +434,7 @@ def main():
         muscle = ex.get('muscle_group', '?')
         print(f"    - {ex['name']} [{muscle}]: {len(ex['sets'])} sets")
 
-    # Fetch workout count
-    print("\n→ Fetching workout count...")
-    total_count = fetch_workout_count(api_key)
-    print(f"✓ Total workouts: {total_count}")
-
-    # Build output data — history comes directly from API
+    # Build output data from the archive
     new_data = {
         "last_updated": datetime.now().isoformat(),
         "profile_url": HEVY_PROFILE_URL,
@@ -227,10 +445,32 @@ def main():
         "previous_workouts": parsed[1:]  # Remaining workouts as history
     }
 
+    numeric_data = {
+        "last_updated": new_data["last_updated"],
+        "workouts": [m.to_numeric() for m in models]
+    }
+
     print(f"\n✓ Tracking {len(parsed)} workouts total (1 current + {len(parsed) - 1} history)")
 
+    print("\n→ Updating weekly training load...")
+    training_load.apply_changes(load_state, load_added, load_removed, templates)
+    load_data = {"last_updated": new_data["last_updated"], **training_load.artifact(load_state)}
+    streak = load_data["streaks"]
+    print(f"✓ {len(load_added)} workouts added, {len(load_removed)} removed "
+          f"({len(load_state['weeks'])} weeks, streak {streak['current_weeks']} weeks, "
+          f"longest {streak['longest_weeks']})")
+
+    print("\n→ API usage:")
+    client.report()
+    http = get_client()
+    http.report()
+
     # Save
-    if save_data(new_data):
+    if (save_data(new_data) and save_data(numeric_data, NUMERIC_FILE)
+            and save_data(load_data, training_load.OUTPUT_FILE) and save_archive(archive)):
+        # Totals are only remembered once the artifact built from them is out
+        training_load.save_state(load_state)
+        http.save([HEVY_API_BASE])
         print("✓ Fetch completed successfully")
         return 0
     else:
@@ -239,4 +479,4 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(instrumentation.run(main, 'hevy'))
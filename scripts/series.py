@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Series Analytics
+NumPy-backed helpers shared by the rates and liquidity fetchers. Every
+function takes a chronological sequence (oldest first, None for missing)
+and works on the whole array at once; missing results are NaN.
+"""
+
+import numpy as np
+
+
+def to_array(values):
+    """Convert a sequence with None gaps into a float64 array with NaN gaps"""
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float64, copy=False)
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def to_list(arr, digits=2):
+    """Round an array back into a list, with None for NaN"""
+    return [None if np.isnan(x) else round(float(x), digits) for x in arr]
+
+
+def pct_change(values, periods=1):
+    """Percentage change against the value `periods` steps earlier"""
+    arr = to_array(values)
+    out = np.full(arr.shape, np.nan)
+    if len(arr) > periods:
+        previous = arr[:-periods]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[periods:] = np.where(previous > 0, (arr[periods:] - previous) / previous * 100, np.nan)
+    return out
+
+
+def rolling_mean(values, window):
+    """Mean over a trailing window; NaN unless every value in the window is present"""
+    arr = to_array(values)
+    out = np.full(arr.shape, np.nan)
+    if window > 0 and len(arr) >= window:
+        present = ~np.isnan(arr)
+        sums = np.cumsum(np.insert(np.where(present, arr, 0.0), 0, 0.0))
+        counts = np.cumsum(np.insert(present, 0, False))
+        window_sums = sums[window:] - sums[:-window]
+        full = (counts[window:] - counts[:-window]) == window
+        out[window - 1:] = np.where(full, window_sums / window, np.nan)
+    return out
+
+
+def rolling_std(values, window):
+    """Population standard deviation over a trailing window"""
+    arr = to_array(values)
+    mean = rolling_mean(arr, window)
+    mean_sq = rolling_mean(arr * arr, window)
+    return np.sqrt(np.clip(mean_sq - mean * mean, 0.0, None))
+
+
+def rolling_volatility(values, window):
+    """Standard deviation of period-over-period % changes over a trailing window"""
+    return rolling_std(pct_change(values), window)
+
+
+def premium(quote, reference):
+    """Premium of one rate series over another, in % (e.g. USDT vs official USD)"""
+    quote = to_array(quote)
+    reference = to_array(reference)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(reference > 0, (quote / reference - 1) * 100, np.nan)
+
+
+def asof(times, sample_times, sample_values, tolerance=None, sample_ends=None):
+    """Value of the latest sample at or before each time (an as-of join)
+
+    sample_times must be ascending; times can be in any order. With a
+    tolerance, samples older than it count as missing. A sample that
+    stood for a while (a run of repeats) can pass sample_ends, when it
+    was last seen; its age is then measured from there. Binary search per
+    time, so the cost grows with log(len(samples)).
+    """
+    times = np.asarray(times, dtype=np.int64)
+    sample_times = np.asarray(sample_times, dtype=np.int64)
+    values = to_array(sample_values)
+    out = np.full(times.shape, np.nan)
+    index = np.searchsorted(sample_times, times, side='right') - 1
+    found = index >= 0
+    if tolerance is not None:
+        ends = sample_times if sample_ends is None else np.asarray(sample_ends, dtype=np.int64)
+        found &= times - ends[np.maximum(index, 0)] <= tolerance
+    out[found] = values[index[found]]
+    return out
+
+
+def ratio_change(numerator_pct, denominator_pct):
+    """% change of a ratio from the % changes of its parts
+
+    E.g. base money growth deflated by depreciation: growth in USD terms.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ((1 + to_array(numerator_pct) / 100) / (1 + to_array(denominator_pct) / 100) - 1) * 100
+
+
+def last(arr, digits=2):
+    """Last value of an array rounded, or None when missing"""
+    if len(arr) == 0 or np.isnan(arr[-1]):
+        return None
+    return round(float(arr[-1]), digits)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Monthly History Shards
+Publishes a history split by month plus a manifest
+(data/shards/<series>.json) listing each shard's file, range, entry
+count and content hash.
+
+Months before the newest one are closed and live in
+data/shards/<series>/2026-05.json; clients fetch them as
+<month>.json?v=<sha256>, so those URLs can be cached forever (see
+_headers). The newest month is still being written every run, so it
+lives in data/shards/<series>/current.json and is short-lived like the
+manifest. When a month closes its entries move to the dated file.
+
+Writers must pass every month that is not closed yet; shards whose hash
+and file match the manifest are not rewritten.
+"""
+
+import os
+
+from artifacts import content_hash, load_json, publish_json
+
+SHARDS_DIR = 'data/shards'
+OPEN_SHARD = 'current.json'  # The newest month, rewritten every run
+
+
+def manifest_path(series, root=SHARDS_DIR):
+    return os.path.join(root, f'{series}.json')
+
+
+def shard_file(series, month, closed):
+    """Shard file relative to the shards directory"""
+    return f'{series}/{month}.json' if closed else f'{series}/{OPEN_SHARD}'
+
+
+def shard_outputs(series, root=SHARDS_DIR):
+    """Files and directories a series' shards are written to"""
+    return [os.path.join(root, series), manifest_path(series, root)]
+
+
+def load_manifest(series, root=SHARDS_DIR):
+    """Manifest shards by month ({} if there is no manifest yet)"""
+    manifest = load_json(manifest_path(series, root)) or {}
+    return {shard['month']: shard for shard in manifest.get('shards', [])}
+
+
+def open_months(series, months, root=SHARDS_DIR):
+    """The months that still need publishing: new ones and those not closed"""
+    listed = load_manifest(series, root)
+    return [m for m in months if m not in listed or not listed[m]['closed']]
+
+
+def publish_shards(series, shards, root=SHARDS_DIR):
+    """Publish changed shards and the manifest
+
+    shards maps 'YYYY-MM' to {'first', 'last', 'count', ...payload} for
+    every month not closed yet (so the month that just closed moves out of
+    current.json) and any closed month that may have changed; other months
+    keep their manifest entry.
+    Returns the list of months whose shard was written.
+    """
+    listed = load_manifest(series, root)
+    newest = max([*listed, *shards], default=None)
+
+    written = []
+    for month, shard in sorted(shards.items()):
+        digest = content_hash(shard)
+        previous = listed.get(month)
+        file = shard_file(series, month, closed=month < newest)
+        path = os.path.join(root, file)
+        if not (previous and previous['sha256'] == digest and previous['file'] == file
+                and os.path.exists(path)):
+            publish_json(path, {'series': series, 'month': month, **shard})
+            written.append(month)
+        listed[month] = {
+            'month': month,
+            'file': file,
+            'first': shard['first'],
+            'last': shard['last'],
+            'count': shard['count'],
+            'sha256': digest,
+        }
+
+    for month, entry in listed.items():
+        entry['closed'] = month < newest
+
+    publish_json(manifest_path(series, root), {
+        'series': series,
+        'shards': [listed[m] for m in sorted(listed)],
+    })
+    return written
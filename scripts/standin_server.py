@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Local Stand-in Server
+Serves recorded fixtures in place of bcvapi.tech, DolarApi, the BCV
+workbooks and the Hevy API so the fetchers can be timed and exercised
+offline. BCV workbooks and Hevy data are synthetic unless a fixtures
+directory provides recorded copies.
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+import uuid
+import time
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def synthetic_liquidity_xls(rows):
+    """Liquidity workbook with `rows` weekly rows, newest first (needs xlwt)"""
+    import xlwt
+
+    workbook = xlwt.Workbook()
+    sheet = workbook.add_sheet('Liquidez')
+    sheet.write(0, 0, 'BANCO CENTRAL DE VENEZUELA')
+    sheet.write(2, 0, 'Semana')
+    week = datetime(2026, 8, 14)
+    m2 = 2.4e9
+    for i in range(rows):
+        row = 4 + i
+        sheet.write(row, 0, week.strftime('%d/%m/%Y') + (' (*)' if i == 0 else ''))
+        for col in (1, 2, 3, 5):
+            sheet.write(row, col, m2 * col / 10)
+        sheet.write(row, 4, m2 * 0.99)  # Dinero (M1)
+        sheet.write(row, 6, m2)  # Liquidez Monetaria (M2)
+        sheet.write(row, 7, '(1,23)' if i % 3 == 0 else '2,50')
+        week -= timedelta(weeks=1)
+        m2 *= 0.99
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def synthetic_base_monetaria_xls(rows, weeks=52, end=datetime(2026, 8, 14), legacy=False):
+    """Base monetaria workbook: `rows` category rows x `weeks` date columns (needs xlwt)
+
+    legacy=True mimics older workbooks: a longer title block and the dates
+    stored as date cells.
+    """
+    import xlwt
+
+    workbook = xlwt.Workbook()
+    sheet = workbook.add_sheet('Base')
+    dates_row = 8 if legacy else 5
+    date_style = xlwt.easyxf(num_format_str='DD/MM/YYYY')
+    week = end - timedelta(weeks=weeks - 1)
+    for col in range(1, weeks + 1):
+        if legacy:
+            sheet.write(dates_row, col, week, date_style)
+        else:
+            sheet.write(dates_row, col, week.strftime('%d/%m/%Y') + (' (*)' if col == weeks else ''))
+        week += timedelta(weeks=1)
+    usos_row = max(dates_row + 2, rows - 2)
+    for row in range(dates_row + 1, max(rows, usos_row + 1)):
+        sheet.write(row, 0, 'USOS' if row == usos_row else f'Rubro {row}')
+        for col in range(1, weeks + 1):
+            sheet.write(row, col, 1.3e9 + col * 1e6 + row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def synthetic_legacy_liquidity_xls(year):
+    """An older-layout liquidity workbook for one year (needs xlwt)
+
+    Weeks run oldest first as date cells, the columns are in another order
+    (M2 before M1) and there is no variation column.
+    """
+    import xlwt
+
+    workbook = xlwt.Workbook()
+    sheet = workbook.add_sheet('Liquidez')
+    sheet.write(0, 0, 'BANCO CENTRAL DE VENEZUELA')
+    for col, label in enumerate(('Semana', 'Circulante', 'Liquidez Monetaria (M2)', 'Dinero (M1)')):
+        sheet.write(3, col, label)
+    date_style = xlwt.easyxf(num_format_str='DD/MM/YYYY')
+    week = datetime(year, 1, 1)
+    week += timedelta(days=(4 - week.weekday()) % 7)  # first Friday
+    m2 = 1e6 * 1.9 ** (year - 2016)
+    row = 5
+    while week.year == year:
+        sheet.write(row, 0, week, date_style)
+        sheet.write(row, 1, m2 * 0.1)
+        sheet.write(row, 2, m2)
+        sheet.write(row, 3, m2 * 0.8)
+        week += timedelta(weeks=1)
+        m2 *= 1.012
+        row += 1
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def synthetic_hevy(workouts=120, templates=450):
+    """Deterministic Hevy workouts (newest first) and exercise templates"""
+    muscles = ['chest', 'lats', 'upper_back', 'quadriceps', 'hamstrings', 'shoulders', 'biceps', 'triceps']
+    template_list = [{
+        'id': f'T{i:04d}',
+        'title': f'Exercise {i}',
+        'primary_muscle_group': muscles[i % len(muscles)],
+        'secondary_muscle_groups': [muscles[(i + 3) % len(muscles)]] if i % 2 else [],
+    } for i in range(templates)]
+
+    workout_list = []
+    start = datetime(2026, 8, 21, 18, 0, tzinfo=timezone.utc)
+    for i in range(workouts):
+        begin = start - timedelta(days=2 * i)
+        workout_list.append({
+            'id': str(uuid.UUID(int=i + 1)),  # Hevy workout ids are UUIDs
+            'title': f'Workout {i % 4 + 1}',
+            'start_time': begin.isoformat().replace('+00:00', 'Z'),
+            'end_time': (begin + timedelta(minutes=75)).isoformat().replace('+00:00', 'Z'),
+            'updated_at': begin.isoformat().replace('+00:00', 'Z'),
+            'exercises': [{
+                'title': f'Exercise {(i * 7 + j) % templates}',
+                'exercise_template_id': f'T{(i * 7 + j) % templates:04d}',
+                'sets': [{'weight_kg': 40 + 5 * j + k, 'reps': 8 + k, 'rpe': 7 + k * 0.5} for k in range(3)],
+            } for j in range(6)],
+        })
+    return workout_list, template_list
+
+
+class StandinServer:
+    """Threaded HTTP server with routes mimicking every upstream the fetchers use"""
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, liquidity_rows=520, base_rows=70,
+                 hevy_workouts=120, latency_ms=0, route_latency_ms=None):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency_ms / 1000
+        # Extra delay for single routes, e.g. to slow down one rate provider
+        self.route_latency = {path: ms / 1000 for path, ms in (route_latency_ms or {}).items()}
+        self.requests = {}
+        self._lock = threading.Lock()
+
+        self.json_routes = {
+            '/bcvapi/api/v1/euro/public': self._fixture_json('bcvapi-euro.json'),
+            '/bcvapi/api/v1/dolar/public': self._fixture_json('bcvapi-dolar.json'),
+            '/dolarapi/v1/dolares/paralelo': self._fixture_json('dolarapi-paralelo.json'),
+            '/dolarapi/v1/dolares/oficial': self._fixture_json('dolarapi-oficial-usd.json'),
+            '/dolarapi/v1/euros/oficial': self._fixture_json('dolarapi-oficial-eur.json'),
+        }
+        self.files = {
+            '/bcv/liquidez_monetaria_semanal1.xls': (
+                self._fixture_bytes('liquidez_monetaria_semanal1.xls') or synthetic_liquidity_xls(liquidity_rows)),
+            '/bcv/base_monetaria_semanal.xls': (
+                self._fixture_bytes('base_monetaria_semanal.xls') or synthetic_base_monetaria_xls(base_rows)),
+        }
+        self.workouts, self.templates = synthetic_hevy(hevy_workouts)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.base_url = f'http://127.0.0.1:{self.httpd.server_port}'
+
+    def _fixture_json(self, name):
+        with open(os.path.join(self.fixtures_dir, name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _fixture_bytes(self, name):
+        path = os.path.join(self.fixtures_dir, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+        return None
+
+    def env(self):
+        """Environment overrides pointing every fetcher at this server"""
+        return {
+            'EUR_API': f'{self.base_url}/bcvapi/api/v1/euro/public',
+            'USD_API': f'{self.base_url}/bcvapi/api/v1/dolar/public',
+            'USDT_API': f'{self.base_url}/dolarapi/v1/dolares/paralelo',
+            'EUR_API_BACKUP': f'{self.base_url}/dolarapi/v1/euros/oficial',
+            'USD_API_BACKUP': f'{self.base_url}/dolarapi/v1/dolares/oficial',
+            'LIQUIDITY_URL': f'{self.base_url}/bcv/liquidez_monetaria_semanal1.xls',
+            'BASE_MONETARIA_URL': f'{self.base_url}/bcv/base_monetaria_semanal.xls',
+            'HEVY_API_BASE': f'{self.base_url}/hevy/v1',
+            'HEVY_API_KEY': 'standin',
+        }
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send_body(self, status, body, content_type='application/json', headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_json(self, obj, status=200):
+                self.send_body(status, json.dumps(obj).encode('utf-8'))
+
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                query = dict(urllib.parse.parse_qsl(url.query))
+                with server._lock:
+                    server.requests[url.path] = server.requests.get(url.path, 0) + 1
+                delay = server.latency + server.route_latency.get(url.path, 0)
+                if delay:
+                    time.sleep(delay)
+
+                if url.path in server.json_routes:
+                    return self.send_json(server.json_routes[url.path])
+                if url.path in server.files:
+                    return self.send_file(server.files[url.path])
+                if url.path.startswith('/hevy/v1/'):
+                    return self.send_hevy(url.path[len('/hevy/v1'):], query)
+                self.send_json({'error': 'not found'}, 404)
+
+            def send_file(self, body):
+                etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_body(200, body, 'application/vnd.ms-excel', {'ETag': etag})
+
+            def send_page(self, items, key, query):
+                page = int(query.get('page', 1))
+                page_size = int(query.get('pageSize', 10))
+                page_count = max(1, -(-len(items) // page_size))
+                if page > page_count:
+                    return self.send_json({'error': 'page not found'}, 404)
+                start = (page - 1) * page_size
+                self.send_json({'page': page, 'page_count': page_count, key: items[start:start + page_size]})
+
+            def send_hevy(self, path, query):
+                if path == '/workouts/count':
+                    return self.send_json({'workout_count': len(server.workouts)})
+                if path == '/workouts':
+                    return self.send_page(server.workouts, 'workouts', query)
+                if path == '/workouts/events':
+                    since = query.get('since', '')
+                    events = [{'type': 'updated', 'workout': w} for w in server.workouts
+                              if w['updated_at'] > since]
+                    if not events:
+                        return self.send_json({'error': 'no events'}, 404)
+                    return self.send_page(events, 'events', query)
+                if path == '/exercise_templates':
+                    return self.send_page(server.templates, 'exercise_templates', query)
+                for prefix, items in (('/workouts/', server.workouts), ('/exercise_templates/', server.templates)):
+                    if path.startswith(prefix):
+                        item_id = path[len(prefix):]
+                        for item in items:
+                            if item['id'] == item_id:
+                                return self.send_json(item)
+                self.send_json({'error': 'not found'}, 404)
+
+        return Handler
+
+
+def main():
+    """Serve the stand-ins until interrupted and print the environment to use"""
+    server = StandinServer().start()
+    for key, value in server.env().items():
+        print(f"export {key}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Training Load
+Per-ISO-week totals for each muscle group (sets, volume, frequency) and
+weekly training streaks, kept up to date incrementally: each run only
+parses the workouts that are new or changed since the last run and adds
+their contribution to the stored totals (a changed or deleted workout's
+old contribution is subtracted first). The published artifact holds the
+recent weeks and the streaks, so the widget never needs the archive.
+"""
+
+import json
+import os
+from datetime import date, timedelta
+
+from workout_model import Workout
+
+OUTPUT_FILE = 'data/gym-training-load.json'
+STATE_FILE = '.cache/hevy/training-load.json'  # Totals plus each workout's contribution
+MAX_WEEKS = 26  # Weeks published, newest first
+UNKNOWN_MUSCLE = 'other'  # Exercises whose template has no muscle group
+
+
+def week_key(iso_date):
+    """'2026-05-11' -> ISO week '2026-W20'"""
+    year, week, _ = date.fromisoformat(iso_date).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def week_start(key):
+    """ISO week '2026-W20' -> its Monday"""
+    year, week = key.split('-W')
+    return date.fromisocalendar(int(year), int(week), 1)
+
+
+def empty_state():
+    return {'weeks': {}, 'workouts': {}}
+
+
+def load_state(path=STATE_FILE):
+    """Load the running totals; a missing state rebuilds from the archive"""
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"WARNING: Could not load training load state: {e}")
+    return empty_state()
+
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def pending_changes(state, archive):
+    """Archive workouts not yet counted (new or updated) and ids no longer in it
+
+    Only ids and update times are compared; nothing is parsed.
+    """
+    counted = state['workouts']
+    workouts = archive['workouts']
+    added = [w for wid, w in workouts.items()
+             if wid not in counted or counted[wid]['updated_at'] != w.get('updated_at')]
+    removed = [wid for wid in counted if wid not in workouts]
+    return added, removed
+
+
+def contribution(workout):
+    """One parsed workout's share of its week's totals"""
+    muscles = {}
+    for ex in workout.exercises:
+        group = muscles.setdefault(ex.muscle_group or UNKNOWN_MUSCLE,
+                                   {'sets': 0, 'secondary_sets': 0, 'volume_kg': 0.0})
+        group['sets'] += len(ex.sets)
+        group['volume_kg'] += ex.volume
+        for muscle in ex.secondary_muscles:
+            if muscle != ex.muscle_group:
+                muscles.setdefault(muscle, {'sets': 0, 'secondary_sets': 0, 'volume_kg': 0.0})
+                muscles[muscle]['secondary_sets'] += len(ex.sets)
+    return {'week': week_key(workout.date), 'muscles': muscles}
+
+
+def fold(state, share, sign):
+    """Add (sign=1) or subtract (sign=-1) a contribution from the week totals"""
+    week = state['weeks'].setdefault(share['week'], {'workouts': 0, 'muscles': {}})
+    week['workouts'] += sign
+    for name, values in share['muscles'].items():
+        totals = week['muscles'].setdefault(
+            name, {'sets': 0, 'secondary_sets': 0, 'volume_kg': 0.0, 'frequency': 0})
+        totals['sets'] += sign * values['sets']
+        totals['secondary_sets'] += sign * values['secondary_sets']
+        totals['volume_kg'] = round(totals['volume_kg'] + sign * values['volume_kg'], 2)
+        if values['sets']:
+            totals['frequency'] += sign
+        if not (totals['sets'] or totals['secondary_sets']):
+            del week['muscles'][name]
+    if week['workouts'] <= 0:
+        del state['weeks'][share['week']]
+
+
+def apply_changes(state, added, removed, templates):
+    """Fold new/updated workouts in and deleted ones out; returns workouts parsed"""
+    for wid in removed:
+        fold(state, state['workouts'].pop(wid), -1)
+
+    for raw in added:
+        previous = state['workouts'].pop(raw['id'], None)
+        if previous:
+            fold(state, previous, -1)
+        share = contribution(Workout.from_api(raw, templates))
+        share['updated_at'] = raw.get('updated_at')
+        fold(state, share, 1)
+        state['workouts'][raw['id']] = share
+    return len(added)
+
+
+def streaks(weeks, today=None):
+    """Current and longest runs of consecutive ISO weeks with a workout
+
+    The current streak is still alive if this week has no workout yet.
+    """
+    active = sorted(k for k, w in weeks.items() if w['workouts'] > 0)
+    longest = run = 0
+    previous = None
+    for key in active:
+        monday = week_start(key)
+        run = run + 1 if previous and monday - previous == timedelta(weeks=1) else 1
+        longest = max(longest, run)
+        previous = monday
+
+    this_week = week_start(week_key((today or date.today()).isoformat()))
+    alive = previous is not None and this_week - previous <= timedelta(weeks=1)
+    return {
+        'current_weeks': run if alive else 0,
+        'longest_weeks': longest,
+        'last_active_week': active[-1] if active else None,
+    }
+
+
+def artifact(state, max_weeks=MAX_WEEKS):
+    """The published document: recent weeks newest first, plus streaks"""
+    keys = sorted(state['weeks'], reverse=True)[:max_weeks]
+    return {
+        'weeks': [{
+            'week': key,
+            'start': week_start(key).isoformat(),
+            'workouts': state['weeks'][key]['workouts'],
+            'muscles': {
+                name: {**totals, 'volume_kg': round(totals['volume_kg'], 1)}
+                for name, totals in sorted(state['weeks'][key]['muscles'].items())
+            },
+        } for key in keys],
+        'streaks': streaks(state['weeks']),
+    }
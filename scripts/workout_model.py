@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Workout Model
+Compact numeric representation of Hevy workouts. Sets keep weight, reps
+and RPE as numbers, and per-exercise aggregates (volume, top set,
+estimated 1RM) are computed once at ingest. The display JSON for the
+gym widget and the numeric JSON are both rendered from this model.
+"""
+
+from datetime import datetime
+
+
+def estimate_1rm(weight_kg, reps):
+    """Epley estimate of a one-rep max"""
+    if not weight_kg or not reps:
+        return 0.0
+    if reps == 1:
+        return float(weight_kg)
+    return weight_kg * (1 + reps / 30)
+
+
+def format_weight(weight_kg):
+    """'70 kg', '58.9 kg'"""
+    return f"{round(weight_kg, 1):g} kg"
+
+
+class WorkoutSet:
+    """One set: numeric weight (kg), reps and optional RPE"""
+
+    __slots__ = ('weight_kg', 'reps', 'rpe')
+
+    def __init__(self, weight_kg, reps, rpe=None):
+        self.weight_kg = weight_kg
+        self.reps = reps
+        self.rpe = rpe
+
+    @property
+    def volume(self):
+        return self.weight_kg * self.reps
+
+
+class Exercise:
+    """An exercise with its sets and aggregates computed at construction"""
+
+    __slots__ = ('name', 'template_id', 'muscle_group', 'secondary_muscles', 'sets',
+                 'volume', 'top_set', 'e1rm')
+
+    def __init__(self, name, template_id, sets, muscle_group=None, secondary_muscles=None):
+        self.name = name
+        self.template_id = template_id
+        self.muscle_group = muscle_group
+        self.secondary_muscles = secondary_muscles or []
+        self.sets = sets
+
+        self.volume = sum(s.volume for s in sets)
+        self.top_set = max(sets, key=lambda s: (s.weight_kg, s.reps)) if sets else None
+        self.e1rm = max((estimate_1rm(s.weight_kg, s.reps) for s in sets), default=0.0)
+
+
+class Workout:
+    """A parsed workout"""
+
+    __slots__ = ('id', 'name', 'date', 'duration_min', 'exercises', 'volume')
+
+    def __init__(self, id, name, date, duration_min, exercises):
+        self.id = id
+        self.name = name
+        self.date = date
+        self.duration_min = duration_min
+        self.exercises = exercises
+        self.volume = sum(ex.volume for ex in exercises)
+
+    @classmethod
+    def from_api(cls, workout, templates):
+        """Build a workout from a Hevy API workout and the template map"""
+        # Calculate duration from start_time and end_time
+        duration_min = 0
+        workout_date = datetime.now().strftime("%Y-%m-%d")
+        try:
+            start = datetime.fromisoformat(workout["start_time"].replace("Z", "+00:00"))
+            workout_date = start.strftime("%Y-%m-%d")
+            end = datetime.fromisoformat(workout["end_time"].replace("Z", "+00:00"))
+            duration_min = int((end - start).total_seconds() / 60)
+        except (KeyError, ValueError):
+            pass
+
+        exercises = []
+        for ex in workout.get("exercises", []):
+            # Sets without reps are skipped; sets without weight count as 0 kg
+            sets = [WorkoutSet(s.get("weight_kg") or 0, s["reps"], s.get("rpe"))
+                    for s in ex.get("sets", []) if s.get("reps") is not None]
+            if not sets:
+                continue
+
+            template_id = ex.get("exercise_template_id", "")
+            template = templates.get(template_id) if template_id else None
+            exercises.append(Exercise(
+                name=ex.get("title", "Unknown"),
+                template_id=template_id,
+                sets=sets,
+                muscle_group=template["primary_muscle_group"] if template else None,
+                secondary_muscles=template["secondary_muscle_groups"] if template else None,
+            ))
+
+        return cls(workout.get("id"), workout.get("title", "Workout"), workout_date, duration_min, exercises)
+
+    def to_display(self):
+        """Render the display JSON used by js/gym-widget.js"""
+        exercises = []
+        for ex in self.exercises:
+            exercise_data = {
+                "name": ex.name,
+                "sets": [{"reps": s.reps, "weight": format_weight(s.weight_kg)} for s in ex.sets]
+            }
+            if ex.muscle_group is not None:
+                exercise_data["muscle_group"] = ex.muscle_group
+                if ex.secondary_muscles:
+                    exercise_data["secondary_muscles"] = ex.secondary_muscles
+            exercises.append(exercise_data)
+
+        return {
+            "name": self.name,
+            "date": self.date,
+            "duration": f"{self.duration_min} min",
+            "volume": f"{self.volume:,.0f} kg",
+            "exercises": exercises
+        }
+
+    def to_numeric(self):
+        """Render the numeric JSON: sets as [weight_kg, reps, rpe] rows"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "date": self.date,
+            "duration_min": self.duration_min,
+            "volume_kg": round(self.volume, 1),
+            "exercises": [{
+                "name": ex.name,
+                "template_id": ex.template_id,
+                "muscle_group": ex.muscle_group,
+                "secondary_muscles": ex.secondary_muscles,
+                "sets": [[round(s.weight_kg, 2), s.reps, s.rpe] for s in ex.sets],
+                "volume_kg": round(ex.volume, 1),
+                "top_set": [round(ex.top_set.weight_kg, 2), ex.top_set.reps],
+                "e1rm_kg": round(ex.e1rm, 1),
+            } for ex in self.exercises]
+        }
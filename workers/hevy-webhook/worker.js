@@ -3,6 +3,8 @@
  *
  * Receives POST from Hevy webhook and triggers
  * the GitHub Actions workflow via repository_dispatch.
+ * The workout id is forwarded as client_payload.workout_id so the
+ * workflow can ingest just that workout.
  *
  * Environment variables (set in Cloudflare dashboard):
  *   GITHUB_TOKEN  - GitHub PAT with repo dispatch permission
@@ -10,6 +12,7 @@
  */
 
 const GITHUB_REPO = "Cjj109/carlosjardim.com";
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
 
 export default {
   async fetch(request, env) {
@@ -32,7 +35,20 @@ export default {
       waitUntil: (promise) => promise
     };
 
-    const triggerPromise = triggerGitHubWorkflow(env.GITHUB_TOKEN);
+    // Hevy posts { id, payload: { workoutId } }
+    let workoutId = null;
+    try {
+      const body = await request.json();
+      workoutId = body?.payload?.workoutId || body?.workoutId || null;
+      // Hevy workout ids are UUIDs; anything else only triggers a full sync
+      if (workoutId !== null && !UUID_PATTERN.test(String(workoutId))) {
+        workoutId = null;
+      }
+    } catch (e) {
+      // No usable body: the workflow falls back to a full sync
+    }
+
+    const triggerPromise = triggerGitHubWorkflow(env.GITHUB_TOKEN, workoutId);
 
     // Use waitUntil if available (Cloudflare Workers)
     if (typeof ctx.waitUntil === "function") {
@@ -53,7 +69,7 @@ export default {
   }
 };
 
-async function triggerGitHubWorkflow(token) {
+async function triggerGitHubWorkflow(token, workoutId) {
   const response = await fetch(
     `https://api.github.com/repos/${GITHUB_REPO}/dispatches`,
     {
@@ -65,7 +81,8 @@ async function triggerGitHubWorkflow(token) {
         "Content-Type": "application/json"
       },
       body: JSON.stringify({
-        event_type: "hevy-workout"
+        event_type: "hevy-workout",
+        client_payload: workoutId ? { workout_id: String(workoutId) } : {}
       })
     }
   );